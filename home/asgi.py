@@ -3,6 +3,11 @@ ASGI config for home project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve the site through it (e.g. ``uvicorn home.asgi:application``) for
+the live notification count: ``notifications/stream/`` is an async
+Server-Sent Events view, so each idle browser connection waits on the
+event loop instead of holding a worker thread (see school/live.py).
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
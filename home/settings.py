@@ -79,6 +79,13 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Background threads (notification buffer, fan-out) write alongside
+        # requests: take the write lock when a transaction starts and wait
+        # for it, instead of failing with "database is locked" on upgrade
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
@@ -129,3 +136,61 @@ LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'login'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+
+# Cached rosters, result statistics and leaderboards are invalidated from
+# signals, so every server process must share the cache: the default
+# per-process memory cache would only be cleared in the process that made
+# the change. Files work for several processes on one host; with several
+# hosts use Redis or Memcached instead. Each entry also has a short timeout,
+# which bounds how stale it can get where the cache is not shared.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+    }
+}
+
+# Seconds a classroom roster stays cached (it is also dropped when a student
+# joins, leaves or is renamed)
+SCHOOL_ROSTER_CACHE_TIMEOUT = 300
+
+# Chronic-absence alerts (school/absence.py): a student is flagged after this
+# many consecutive absences, or when the share of absent days over the last
+# 30 days reaches the rate (once at least RATE_MIN_DAYS days are recorded).
+SCHOOL_ABSENCE_STREAK_THRESHOLD = 3
+SCHOOL_ABSENCE_RATE_THRESHOLD = 0.25
+SCHOOL_ABSENCE_RATE_MIN_DAYS = 10
+
+# Rows per page on the paginated list pages
+SCHOOL_PAGE_SIZE = 25
+
+# Seconds before the in-process autocomplete index is rebuilt from the database
+SCHOOL_AUTOCOMPLETE_MAX_AGE = 300
+
+# Days of per-day attendance counters kept for the dashboard
+SCHOOL_DASHBOARD_ATTENDANCE_DAYS = 30
+
+# Notification fan-out (school/fanout.py): audiences up to the inline limit
+# are written during the request, larger ones by a background thread in
+# chunks (or by `manage.py send_notifications` when background is off)
+SCHOOL_FANOUT_INLINE_LIMIT = 200
+SCHOOL_FANOUT_CHUNK_SIZE = 1000
+SCHOOL_FANOUT_BACKGROUND = True
+
+# Audit notifications (create_notification) are buffered in memory and
+# written in batches by a background thread: at this many, every interval
+# seconds, and on shutdown. Off writes each one inline. At most LIMIT wait;
+# beyond that the oldest are dropped.
+SCHOOL_NOTIFICATION_BUFFER_SIZE = 100
+SCHOOL_NOTIFICATION_BUFFER_LIMIT = 10000
+SCHOOL_NOTIFICATION_FLUSH_INTERVAL = 2.0
+SCHOOL_NOTIFICATION_WRITE_BEHIND = True
+
+# Seconds between keep-alive comments on an idle live notification stream
+SCHOOL_LIVE_HEARTBEAT = 25
+
+# Seconds a live notification stream stays open before the browser reconnects
+SCHOOL_LIVE_MAX_AGE = 300
+
+# Seconds between unread count polls when the site is served through WSGI
+SCHOOL_LIVE_POLL_INTERVAL = 60
@@ -0,0 +1,193 @@
+"""
+Chronic-absence detection, maintained on write.
+
+Each student has an AbsenceStreak row holding two 30-bit masks (days with
+a record, days marked Absent). Every attendance write flips one bit, then
+the consecutive-absence streak and the rolling absence rate are read off
+the masks. When either crosses its threshold the class teacher gets a
+notification, once per episode.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import AbsenceStreak, Student
+from .utils import create_notification
+
+WINDOW_DAYS = 30
+WINDOW_MASK = (1 << WINDOW_DAYS) - 1
+
+# Consecutive recorded absences that flag a student
+STREAK_THRESHOLD = getattr(settings, 'SCHOOL_ABSENCE_STREAK_THRESHOLD', 3)
+# Share of recorded days absent over the window that flags a student
+RATE_THRESHOLD = getattr(settings, 'SCHOOL_ABSENCE_RATE_THRESHOLD', 0.25)
+# Recorded days needed in the window before the rate is trusted
+RATE_MIN_DAYS = getattr(settings, 'SCHOOL_ABSENCE_RATE_MIN_DAYS', 10)
+
+BATCH_SIZE = 500
+
+# Fields written back after an attendance change
+STATE_FIELDS = ('window_end', 'recorded_mask', 'absent_mask', 'streak', 'flagged', 'flagged_on')
+
+# Rows per bulk_update: its CASE expression grows with every row of the batch
+UPDATE_BATCH_SIZE = 100
+
+
+def _set_day(state, day, status):
+    """Record ``status`` ('Present', 'Absent' or None to clear) for ``day``."""
+    if state.window_end is None:
+        state.window_end = day
+
+    offset = (state.window_end - day).days
+    if offset < 0:
+        # A newer day: slide the window forward
+        state.recorded_mask = (state.recorded_mask << -offset) & WINDOW_MASK
+        state.absent_mask = (state.absent_mask << -offset) & WINDOW_MASK
+        state.window_end = day
+        offset = 0
+    elif offset >= WINDOW_DAYS:
+        # Older than the window: does not affect the current figures
+        return
+
+    bit = 1 << offset
+    state.recorded_mask &= ~bit
+    state.absent_mask &= ~bit
+    if status is not None:
+        state.recorded_mask |= bit
+        if status == 'Absent':
+            state.absent_mask |= bit
+
+
+def current_streak(state):
+    """Consecutive absences back from the newest recorded day in the window."""
+    streak = 0
+    for offset in range(WINDOW_DAYS):
+        if state.recorded_mask >> offset & 1:
+            if not state.absent_mask >> offset & 1:
+                break
+            streak += 1
+    return streak
+
+
+def absence_rate(state):
+    recorded = bin(state.recorded_mask).count('1')
+    if recorded < RATE_MIN_DAYS:
+        return None
+    return bin(state.absent_mask).count('1') / recorded
+
+
+def is_chronic(state):
+    rate = absence_rate(state)
+    return state.streak >= STREAK_THRESHOLD or (rate is not None and rate >= RATE_THRESHOLD)
+
+
+def _snapshot(state):
+    return tuple(getattr(state, field) for field in STATE_FIELDS)
+
+
+def _save_states(states):
+    """
+    Write changed states: rows ending up with the same values share one
+    ``UPDATE ... WHERE id IN (...)`` (a whole class marked on the same
+    days), the rest go through bulk_update in small batches.
+    """
+    groups = defaultdict(list)
+    for state in states:
+        groups[_snapshot(state)].append(state)
+
+    singles = []
+    for values, members in groups.items():
+        if len(members) == 1:
+            singles.extend(members)
+            continue
+        ids = [state.pk for state in members]
+        for start in range(0, len(ids), BATCH_SIZE):
+            AbsenceStreak.objects.filter(pk__in=ids[start:start + BATCH_SIZE]).update(
+                **dict(zip(STATE_FIELDS, values))
+            )
+    AbsenceStreak.objects.bulk_update(singles, STATE_FIELDS, batch_size=UPDATE_BATCH_SIZE)
+
+
+def update_absence_state(entries, notify=True):
+    """
+    Apply attendance writes to the per-student state.
+
+    ``entries`` is an iterable of ``(student_id, date, status)`` where
+    ``status`` is None for a removed record. Students that become chronic
+    absentees are flagged and, if ``notify``, their class teacher is told.
+    """
+    entries = sorted(entries, key=lambda entry: entry[1])
+    if not entries:
+        return
+
+    student_ids = sorted({entry[0] for entry in entries})
+
+    with transaction.atomic():
+        states = {}
+        for start in range(0, len(student_ids), BATCH_SIZE):
+            chunk = student_ids[start:start + BATCH_SIZE]
+            states.update(
+                (state.student_id, state)
+                for state in AbsenceStreak.objects.filter(student_id__in=chunk)
+            )
+
+        # Removals alone never create state (e.g. the student is being deleted)
+        missing = sorted({
+            student_id for student_id, _, status in entries
+            if status is not None and student_id not in states
+        })
+        if missing:
+            AbsenceStreak.objects.bulk_create(
+                [AbsenceStreak(student_id=student_id) for student_id in missing],
+                ignore_conflicts=True
+            )
+            states.update(
+                (state.student_id, state)
+                for state in AbsenceStreak.objects.filter(student_id__in=missing)
+            )
+
+        before = {student_id: _snapshot(state) for student_id, state in states.items()}
+        for student_id, day, status in entries:
+            if student_id in states:
+                _set_day(states[student_id], day, status)
+
+        newly_flagged = []
+        changed = []
+        for student_id, state in states.items():
+            state.streak = current_streak(state)
+            chronic = is_chronic(state)
+            if chronic and not state.flagged:
+                state.flagged = True
+                state.flagged_on = state.window_end
+                newly_flagged.append(state)
+            elif not chronic and state.flagged:
+                state.flagged = False
+                state.flagged_on = None
+            if _snapshot(state) != before[student_id]:
+                changed.append(state)
+
+        _save_states(changed)
+
+        if notify and newly_flagged:
+            _notify_class_teachers(newly_flagged)
+
+
+def _notify_class_teachers(states):
+    students = Student.objects.select_related('user', 'classroom').filter(
+        id__in=[state.student_id for state in states],
+        classroom__class_teacher__isnull=False
+    )
+    by_id = {state.student_id: state for state in states}
+    for student in students:
+        state = by_id[student.id]
+        rate = absence_rate(state)
+        details = f"{state.streak} consecutive absences"
+        if rate is not None:
+            details += f", {rate:.0%} absent over the last {WINDOW_DAYS} days"
+        create_notification(
+            student.classroom.class_teacher,
+            "Chronic Absence Alert",
+            f"Student '{student.user.username}' (roll {student.roll_number}, "
+            f"{student.classroom}) has {details}."
+        )
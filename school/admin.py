@@ -1,5 +1,22 @@
-from django.contrib import admin
-from .models import Teacher, Student
+from django.contrib import admin, messages
+from .models import Teacher, Student, ClassRoom
+from .reportcards import batch_root, generate_report_cards
 
 admin.site.register(Teacher)
 admin.site.register(Student)
+
+
+@admin.action(description="Generate report cards")
+def generate_classroom_report_cards(modeladmin, request, queryset):
+    run = generate_report_cards(classroom_ids=list(queryset.values_list('pk', flat=True)))
+    modeladmin.message_user(
+        request,
+        f"Report cards written to {batch_root(run.batch)}: {run.summary()}",
+        messages.SUCCESS
+    )
+
+
+@admin.register(ClassRoom)
+class ClassRoomAdmin(admin.ModelAdmin):
+    list_display = ('class_name', 'section', 'class_teacher', 'total_students', 'capacity')
+    actions = [generate_classroom_report_cards]
@@ -0,0 +1,152 @@
+"""
+Class-wide result statistics.
+
+The results of a classroom (or of the whole school) are read with one
+``values_list`` query into an ``(students, subjects)`` NumPy block; every
+figure (averages, standard deviations, toppers, grade distribution, ranks)
+is then computed column-wise on that block instead of row by row.
+
+Computed statistics are cached per classroom and dropped from the Result
+and Student signals (see signals.py) whenever a mark in that class changes.
+"""
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Result
+
+# (Result field, subject name) in the order of the report card
+SUBJECTS = (
+    ('subject1', 'Mathematics'),
+    ('subject2', 'Science'),
+    ('subject3', 'English'),
+    ('subject4', 'History'),
+    ('subject5', 'Gujarati'),
+    ('subject6', 'Hindi'),
+    ('subject7', 'Computer'),
+)
+SUBJECT_FIELDS = [field for field, _ in SUBJECTS]
+MAX_MARKS = 100
+
+# Students named per subject when many share the highest mark
+TOPPERS_SHOWN = 5
+
+# Lower percentage bound of each grade, best first (same as Result.save)
+GRADES = (('A+', 90), ('A', 80), ('B', 70), ('C', 60), ('F', 0))
+
+# Seconds cached statistics are kept (they are also dropped on every Result change)
+STATS_CACHE_TIMEOUT = getattr(settings, 'SCHOOL_RESULT_STATS_CACHE_TIMEOUT', 600)
+
+_SCHOOL = 'all'
+
+
+def _cache_key(classroom_id):
+    return f"school:result_stats:{classroom_id if classroom_id is not None else _SCHOOL}"
+
+
+def result_block(classroom_id=None):
+    """
+    ``(students, marks)`` for a classroom (None: the whole school).
+    ``students`` is a list of ``(student_id, roll_number, username)`` and
+    ``marks`` an int array with one row per student and one column per subject.
+    """
+    results = Result.objects.order_by('student__roll_number')
+    if classroom_id is not None:
+        results = results.filter(student__classroom_id=classroom_id)
+    rows = list(results.values_list(
+        'student_id', 'student__roll_number', 'student__user__username', *SUBJECT_FIELDS
+    ))
+    students = [row[:3] for row in rows]
+    marks = np.array([row[3:] for row in rows], dtype=np.int64).reshape(len(rows), len(SUBJECTS))
+    return students, marks
+
+
+def grade_for(percentages):
+    """Grades of an array of percentages."""
+    bounds = np.array([bound for _, bound in reversed(GRADES)])
+    names = np.array([name for name, _ in reversed(GRADES)])
+    return names[np.searchsorted(bounds, percentages, side='right') - 1]
+
+
+def competition_ranks(scores):
+    """1-based ranks, highest score first; ties share a rank (1, 2, 2, 4)."""
+    descending = np.sort(-scores)
+    return np.searchsorted(descending, -scores, side='left') + 1
+
+
+def compute_stats(students, marks):
+    """Statistics of one result block as plain Python values (cacheable)."""
+    count = len(students)
+    stats = {'count': count, 'subjects': [], 'grades': [], 'ranking': []}
+    if not count:
+        return stats
+
+    totals = marks.sum(axis=1)
+    percentages = totals * 100 / (MAX_MARKS * len(SUBJECTS))
+    grades = grade_for(percentages)
+    ranks = competition_ranks(totals)
+
+    stats.update({
+        'average': round(float(percentages.mean()), 2),
+        'std_dev': round(float(percentages.std()), 2),
+        'median': round(float(np.median(percentages)), 2),
+        'highest': round(float(percentages.max()), 2),
+        'lowest': round(float(percentages.min()), 2),
+        'pass_rate': round(float((grades != 'F').mean() * 100), 1),
+    })
+
+    means = marks.mean(axis=0)
+    std_devs = marks.std(axis=0)
+    highest = marks.max(axis=0)
+    lowest = marks.min(axis=0)
+    for column, (field, name) in enumerate(SUBJECTS):
+        toppers = np.flatnonzero(marks[:, column] == highest[column])
+        stats['subjects'].append({
+            'field': field,
+            'name': name,
+            'average': round(float(means[column]), 2),
+            'std_dev': round(float(std_devs[column]), 2),
+            'highest': int(highest[column]),
+            'lowest': int(lowest[column]),
+            'toppers': [students[index][2] for index in toppers[:TOPPERS_SHOWN]],
+            'topper_count': len(toppers),
+        })
+
+    for name, _ in GRADES:
+        matched = int((grades == name).sum())
+        stats['grades'].append({
+            'grade': name,
+            'count': matched,
+            'share': round(matched * 100 / count, 1),
+        })
+
+    for index in np.argsort(ranks, kind='stable'):
+        student_id, roll_number, username = students[index]
+        stats['ranking'].append({
+            'rank': int(ranks[index]),
+            'student_id': student_id,
+            'roll_number': roll_number,
+            'username': username,
+            'total': int(totals[index]),
+            'percentage': round(float(percentages[index]), 2),
+            'grade': str(grades[index]),
+        })
+    return stats
+
+
+def result_statistics(classroom_id=None):
+    """Cached statistics of a classroom (None: the whole school)."""
+    key = _cache_key(classroom_id)
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_stats(*result_block(classroom_id))
+        cache.set(key, stats, STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def invalidate_result_stats(*classroom_ids):
+    """Drop the cached statistics of the given classrooms and of the school."""
+    cache.delete_many(
+        [_cache_key(classroom_id) for classroom_id in set(classroom_ids) if classroom_id is not None]
+        + [_cache_key(None)]
+    )
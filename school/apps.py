@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class SchoolConfig(AppConfig):
     name = 'school'
+
+    def ready(self):
+        # Connect signal handlers (roster cache invalidation, ...)
+        from . import signals  # noqa: F401
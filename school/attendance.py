@@ -0,0 +1,482 @@
+"""
+Bulk attendance engine.
+
+Attendance is written in batches: the existing rows for the affected
+(student, date) pairs are read in one query per chunk, new rows go in with
+a single ``bulk_create`` (upserting on the ``student``/``date`` unique
+constraint) and changed rows with one UPDATE per status, all inside one
+transaction.
+
+Closed terms can be compacted into one AttendanceBitmap per classroom and
+day; the read helpers at the bottom of this module merge both
+representations so callers do not need to know which one holds a day.
+A (student, day) is only ever held by one of them: writing to a compacted
+day first turns its bitmap back into rows (expand_compacted).
+"""
+import hashlib
+from collections import defaultdict, namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date
+from itertools import groupby
+from operator import attrgetter, itemgetter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.dispatch import Signal
+
+from .bitmaps import decode_statuses, encode_statuses
+from .models import Attendance, AttendanceBitmap, Student
+from .pagination import PAGE_SIZE, Page, decode_cursor, encode_cursor
+
+ATTENDANCE_STATUSES = ('Present', 'Absent')
+
+# Seconds a classroom roster stays cached (it is also dropped on Student and
+# username changes)
+ROSTER_CACHE_TIMEOUT = getattr(settings, 'SCHOOL_ROSTER_CACHE_TIMEOUT', 300)
+
+# Rows written per INSERT/UPDATE statement and ids per IN (...) lookup
+BATCH_SIZE = 500
+
+# One written attendance row: old_status is None for a new row
+AttendanceChange = namedtuple(
+    'AttendanceChange',
+    ['student_id', 'date', 'old_status', 'new_status']
+)
+
+RosterEntry = namedtuple('RosterEntry', ['id', 'roll_number', 'username'])
+
+# ``version`` changes whenever the set of students in the class changes
+Roster = namedtuple('Roster', ['classroom_id', 'version', 'students'])
+
+# Sent inside the write transaction with ``changes``: a list of AttendanceChange.
+# bulk_create / bulk_update do not send post_save, so anything derived from
+# attendance listens to this as well.
+attendance_bulk_saved = Signal()
+
+# False while rows are only being moved between representations
+_tracking = ContextVar('school_attendance_tracking', default=True)
+
+
+@contextmanager
+def suspend_tracking():
+    """
+    Skip the derived-state receivers (rollups, ...) for Attendance writes
+    made inside the block. Used when rows are moved, not changed.
+    """
+    token = _tracking.set(False)
+    try:
+        yield
+    finally:
+        _tracking.reset(token)
+
+
+def tracking_enabled():
+    return _tracking.get()
+
+
+def _chunks(items, size=BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _roster_cache_key(classroom_id):
+    return f"school:roster:{classroom_id}"
+
+
+def get_classroom_roster(classroom_id):
+    """
+    Return the cached Roster of a classroom, ordered by roll number.
+    Built with one query on a miss.
+    """
+    key = _roster_cache_key(classroom_id)
+    roster = cache.get(key)
+    if roster is None:
+        students = tuple(
+            RosterEntry(*row)
+            for row in Student.objects.filter(classroom_id=classroom_id)
+            .order_by('roll_number')
+            .values_list('id', 'roll_number', 'user__username')
+        )
+        ids = ','.join(str(entry.id) for entry in students)
+        version = hashlib.sha1(ids.encode()).hexdigest()[:12]
+        roster = Roster(classroom_id, version, students)
+        cache.set(key, roster, ROSTER_CACHE_TIMEOUT)
+    return roster
+
+
+def invalidate_rosters(*classroom_ids):
+    """Drop the cached rosters of the given classrooms (None is ignored)."""
+    cache.delete_many([
+        _roster_cache_key(classroom_id)
+        for classroom_id in set(classroom_ids)
+        if classroom_id is not None
+    ])
+
+
+def day_statuses(student_ids, day):
+    """Map student id -> status for the students already marked on ``day``."""
+    statuses = {}
+    student_ids = list(student_ids)
+    for chunk in _chunks(student_ids):
+        statuses.update(
+            Attendance.objects.filter(student_id__in=chunk, date=day)
+            .values_list('student_id', 'status')
+        )
+    return statuses
+
+
+def bulk_mark_attendance(marks):
+    """
+    Write attendance for many students at once.
+
+    ``marks`` is an iterable of ``(student_id, date, status)``; a later
+    entry for the same student and date wins. Rows whose status does not
+    change are skipped. Returns the list of AttendanceChange written.
+    """
+    wanted = {}
+    for student_id, day, status in marks:
+        if status not in ATTENDANCE_STATUSES:
+            raise ValueError(f"Invalid attendance status: {status!r}")
+        wanted[(int(student_id), day)] = status
+
+    if not wanted:
+        return []
+
+    student_ids = sorted({student_id for student_id, _ in wanted})
+    dates = sorted({day for _, day in wanted})
+
+    with transaction.atomic():
+        expand_compacted(student_ids, dates)
+
+        existing = {}
+        for chunk in _chunks(student_ids):
+            rows = Attendance.objects.filter(
+                student_id__in=chunk,
+                date__in=dates
+            ).values_list('id', 'student_id', 'date', 'status')
+            for pk, student_id, day, status in rows:
+                existing[(student_id, day)] = (pk, status)
+
+        to_create = []
+        to_update = {}
+        changes = []
+        for (student_id, day), status in wanted.items():
+            current = existing.get((student_id, day))
+            if current is None:
+                to_create.append(Attendance(student_id=student_id, date=day, status=status))
+            elif current[1] != status:
+                to_update.setdefault(status, []).append(current[0])
+            else:
+                continue
+            changes.append(AttendanceChange(
+                student_id, day, current[1] if current else None, status
+            ))
+
+        if to_create:
+            # A row inserted concurrently since the read above is updated in place
+            Attendance.objects.bulk_create(
+                to_create,
+                batch_size=BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=['student', 'date'],
+                update_fields=['status']
+            )
+        # Only two statuses exist, so an UPDATE ... WHERE id IN (...) per status
+        # is cheaper than bulk_update's CASE expression over every row
+        for status, ids in to_update.items():
+            for chunk in _chunks(ids):
+                Attendance.objects.filter(id__in=chunk).update(status=status)
+
+        if changes:
+            attendance_bulk_saved.send(sender=Attendance, changes=changes)
+
+    return changes
+
+
+# =========================
+# Bitmap compaction
+# =========================
+def compact_day(day):
+    """
+    Move one day of Attendance rows into per-classroom bitmaps.
+    Students without a classroom keep their rows. Returns the number of
+    rows moved.
+    """
+    with transaction.atomic(), suspend_tracking():
+        rows = list(
+            Attendance.objects.filter(date=day, student__classroom__isnull=False)
+            .values_list('id', 'student_id', 'student__classroom_id', 'status')
+        )
+        if not rows:
+            return 0
+
+        by_classroom = defaultdict(dict)
+        for _, student_id, classroom_id, status in rows:
+            by_classroom[classroom_id][student_id] = status
+
+        existing = {
+            bitmap.classroom_id: bitmap
+            for bitmap in AttendanceBitmap.objects.filter(date=day, classroom_id__in=by_classroom)
+        }
+
+        to_create = []
+        to_update = []
+        for classroom_id, statuses in by_classroom.items():
+            bitmap = existing.get(classroom_id)
+            if bitmap is None:
+                bitmap = AttendanceBitmap(classroom_id=classroom_id, date=day)
+                to_create.append(bitmap)
+            else:
+                # A day compacted earlier got more rows afterwards: merge them
+                merged = decode_statuses(bitmap.students, bitmap.present)
+                merged.update(statuses)
+                statuses = merged
+                to_update.append(bitmap)
+
+            bitmap.students, bitmap.present = encode_statuses(statuses)
+            bitmap.total = len(statuses)
+            bitmap.present_count = sum(1 for status in statuses.values() if status == 'Present')
+
+        AttendanceBitmap.objects.bulk_create(to_create)
+        AttendanceBitmap.objects.bulk_update(
+            to_update, ['students', 'present', 'total', 'present_count']
+        )
+
+        ids = [row[0] for row in rows]
+        for chunk in _chunks(ids):
+            Attendance.objects.filter(id__in=chunk).delete()
+
+    return len(rows)
+
+
+def expand_compacted(student_ids, dates):
+    """
+    Turn the compacted days holding any of ``student_ids`` on ``dates``
+    back into Attendance rows, so a write to such a day updates the
+    student's row instead of adding a second record next to the bitmap.
+    Returns the number of rows restored.
+    """
+    student_ids = set(student_ids)
+    expanded = []
+    for bitmap in AttendanceBitmap.objects.filter(date__in=sorted(set(dates))):
+        statuses = decode_statuses(bitmap.students, bitmap.present)
+        if not student_ids.isdisjoint(statuses):
+            expanded.append((bitmap, statuses))
+    if not expanded:
+        return 0
+
+    with transaction.atomic(), suspend_tracking():
+        # Bitmaps may still list students that were deleted since
+        listed = sorted({student_id for _, statuses in expanded for student_id in statuses})
+        alive = set()
+        for chunk in _chunks(listed):
+            alive.update(Student.objects.filter(id__in=chunk).values_list('id', flat=True))
+
+        rows = [
+            Attendance(student_id=student_id, date=bitmap.date, status=status)
+            for bitmap, statuses in expanded
+            for student_id, status in statuses.items()
+            if student_id in alive
+        ]
+        # A row written next to the bitmap before (the newer record) is kept
+        Attendance.objects.bulk_create(rows, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        AttendanceBitmap.objects.filter(id__in=[bitmap.id for bitmap, _ in expanded]).delete()
+
+    return len(rows)
+
+
+# =========================
+# Read helpers (rows + bitmaps)
+# =========================
+# Filtering by classroom uses the student's current class for live rows and
+# the class at compaction time for bitmaps.
+def _rows_between(start, end, classroom_id=None):
+    rows = Attendance.objects.filter(date__range=(start, end))
+    if classroom_id:
+        rows = rows.filter(student__classroom_id=classroom_id)
+    return rows
+
+
+def _bitmaps_between(start, end, classroom_id=None):
+    bitmaps = AttendanceBitmap.objects.filter(date__range=(start, end))
+    if classroom_id:
+        bitmaps = bitmaps.filter(classroom_id=classroom_id)
+    return bitmaps
+
+
+def attendance_totals(start, end, classroom_id=None):
+    """``{'total_present': n, 'total_absent': n}`` over both representations."""
+    rows = _rows_between(start, end, classroom_id).aggregate(
+        present=Count('id', filter=Q(status='Present')),
+        absent=Count('id', filter=Q(status='Absent'))
+    )
+    bitmaps = _bitmaps_between(start, end, classroom_id).aggregate(
+        present=Sum('present_count'),
+        total=Sum('total')
+    )
+    bitmap_present = bitmaps['present'] or 0
+    return {
+        'total_present': rows['present'] + bitmap_present,
+        'total_absent': rows['absent'] + (bitmaps['total'] or 0) - bitmap_present,
+    }
+
+
+def attendance_breakdown(start, end, classroom_id=None):
+    """
+    Present/absent counts per day and class, newest day first. Each item is
+    a dict with ``date``, ``class_name``, ``section``, ``present``, ``absent``.
+    """
+    merged = defaultdict(lambda: {'present': 0, 'absent': 0})
+
+    grouped = (
+        _rows_between(start, end, classroom_id)
+        .values('date', 'student__classroom__class_name', 'student__classroom__section')
+        .annotate(
+            present=Count('id', filter=Q(status='Present')),
+            absent=Count('id', filter=Q(status='Absent'))
+        )
+        .order_by()
+    )
+    for row in grouped:
+        counts = merged[(row['date'], row['student__classroom__class_name'], row['student__classroom__section'])]
+        counts['present'] += row['present']
+        counts['absent'] += row['absent']
+
+    compacted = _bitmaps_between(start, end, classroom_id).values_list(
+        'date', 'classroom__class_name', 'classroom__section', 'present_count', 'total'
+    )
+    for day, class_name, section, present, total in compacted:
+        counts = merged[(day, class_name, section)]
+        counts['present'] += present
+        counts['absent'] += total - present
+
+    breakdown = [
+        {'date': day, 'class_name': class_name, 'section': section, **counts}
+        for (day, class_name, section), counts in merged.items()
+    ]
+    breakdown.sort(key=lambda row: (row['class_name'] or '', row['section'] or ''))
+    breakdown.sort(key=lambda row: row['date'], reverse=True)
+    return breakdown
+
+
+def _position(day, roll_number):
+    """Sort key of a record on the attendance pages: newest day, then roll number."""
+    return (-day.toordinal(), roll_number)
+
+
+def _live_records(start, end, classroom_id, cursor, backwards, limit):
+    rows = _rows_between(start, end, classroom_id).select_related('student__user', 'student__classroom')
+    if cursor is not None:
+        day, roll_number = cursor
+        if backwards:
+            rows = rows.filter(
+                Q(date__gt=day) | Q(date=day, student__roll_number__lt=roll_number), date__gte=day
+            )
+        else:
+            rows = rows.filter(
+                Q(date__lt=day) | Q(date=day, student__roll_number__gt=roll_number), date__lte=day
+            )
+    ordering = ('date', '-student__roll_number') if backwards else ('-date', 'student__roll_number')
+    return [
+        (_position(record.date, record.student.roll_number), record)
+        for record in rows.order_by(*ordering)[:limit]
+    ]
+
+
+def _compacted_records(start, end, classroom_id, cursor, backwards, limit):
+    """
+    Up to ``limit`` records of compacted days past ``cursor``, decoding one
+    day at a time and loading only the students that make the cut.
+    """
+    bitmaps = _bitmaps_between(start, end, classroom_id).only('date', 'students', 'present')
+    if cursor is not None:
+        bitmaps = bitmaps.filter(**{'date__gte' if backwards else 'date__lte': cursor[0]})
+        cursor = _position(*cursor)
+
+    bitmaps = bitmaps.order_by('date' if backwards else '-date')
+
+    found = []
+    for day, group in groupby(bitmaps.iterator(), key=attrgetter('date')):
+        if len(found) >= limit:
+            break
+        statuses = {}
+        for bitmap in group:
+            statuses.update(decode_statuses(bitmap.students, bitmap.present))
+        # Bitmaps may still list students that were deleted since
+        rolls = {}
+        for chunk in _chunks(sorted(statuses)):
+            rolls.update(Student.objects.filter(id__in=chunk).values_list('id', 'roll_number'))
+        positions = sorted(
+            ((_position(day, roll_number), student_id) for student_id, roll_number in rolls.items()),
+            reverse=backwards
+        )
+        for position, student_id in positions:
+            if cursor is None or (position < cursor if backwards else position > cursor):
+                found.append((position, student_id, day, statuses[student_id]))
+    found = found[:limit]
+
+    students = Student.objects.select_related('user', 'classroom').in_bulk(
+        [student_id for _, student_id, _, _ in found]
+    )
+    return [
+        (position, Attendance(student=students[student_id], date=day, status=status))
+        for position, student_id, day, status in found
+        if student_id in students
+    ]
+
+
+def _record_cursor(values):
+    try:
+        return date.fromisoformat(values[0]), int(values[1])
+    except (TypeError, ValueError):
+        return None
+
+
+def paginate_attendance_records(request, start, end, classroom_id=None, per_page=PAGE_SIZE):
+    """
+    One page of attendance records (a pagination.Page), newest day first
+    then by roll number, selected by the request's ``after`` / ``before``
+    cursor like pagination.paginate. Both the live rows and the compacted
+    days are read only as far as the page needs; compacted records come
+    back as unsaved Attendance instances with ``student`` (and its user and
+    classroom) loaded, like the live rows.
+    """
+    params = request.GET.copy()
+    backwards = False
+    cursor = None
+    if params.get('before'):
+        values = decode_cursor(params['before'], 2)
+        cursor = values and _record_cursor(values)
+        backwards = cursor is not None
+    if cursor is None and params.get('after'):
+        values = decode_cursor(params['after'], 2)
+        cursor = values and _record_cursor(values)
+
+    limit = per_page + 1
+    merged = sorted(
+        _live_records(start, end, classroom_id, cursor, backwards, limit)
+        + _compacted_records(start, end, classroom_id, cursor, backwards, limit),
+        key=itemgetter(0),
+        reverse=backwards
+    )
+    items = [record for _, record in merged[:limit]]
+    more = len(items) > per_page
+    items = items[:per_page]
+    if backwards:
+        items.reverse()
+
+    def record_cursor(record):
+        return encode_cursor([record.date, record.student.roll_number])
+
+    next_cursor = previous_cursor = None
+    if items:
+        # Arriving through a cursor means there are records on the side we came from
+        if more or backwards:
+            next_cursor = record_cursor(items[-1])
+        if (more and backwards) or (cursor is not None and not backwards):
+            previous_cursor = record_cursor(items[0])
+
+    return Page(items, params, next_cursor, previous_cursor)
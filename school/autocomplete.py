@@ -0,0 +1,196 @@
+"""
+In-process prefix index for the typeahead endpoint.
+
+Every student and teacher contributes a few lowercase keys (username, full
+name and each of its words, roll number) to one sorted list of
+``(key, kind, id)`` tuples. A lookup is a ``bisect`` to the first key with
+the typed prefix followed by a short forward scan, so answering does not
+touch the database.
+
+The index is built on first use and kept current from the Student/Teacher
+(and User/ClassRoom) signals of this process. Writes made by other worker
+processes are picked up when the index is rebuilt after
+``SCHOOL_AUTOCOMPLETE_MAX_AGE`` seconds.
+"""
+import threading
+import time
+from bisect import bisect_left, insort
+from functools import lru_cache
+
+from django.conf import settings
+from django.urls import reverse
+
+from .models import Student, Teacher
+
+# Seconds before the index is rebuilt from the database
+MAX_AGE = getattr(settings, 'SCHOOL_AUTOCOMPLETE_MAX_AGE', 300)
+
+# Suggestions returned per lookup
+DEFAULT_LIMIT = 10
+
+STUDENT = 'student'
+TEACHER = 'teacher'
+
+
+def _words(*values):
+    keys = set()
+    for value in values:
+        value = ' '.join((value or '').lower().split())
+        if value:
+            keys.add(value)
+            keys.update(value.split())
+    return keys
+
+
+def _student_entries(student_ids=None):
+    students = Student.objects.values_list(
+        'id', 'roll_number', 'user__username', 'user__first_name', 'user__last_name',
+        'classroom__class_name', 'classroom__section'
+    ).order_by()
+    if student_ids is not None:
+        students = students.filter(id__in=student_ids)
+    for pk, roll_number, username, first_name, last_name, class_name, section in students.iterator(chunk_size=2000):
+        label = f"{username} (roll {roll_number}"
+        if class_name is not None:
+            label += f", {class_name} - {section}"
+        label += ")"
+        keys = _words(username, f"{first_name} {last_name}")
+        keys.add(str(roll_number))
+        yield (STUDENT, pk), keys, label
+
+
+def _teacher_entries(teacher_ids=None):
+    teachers = Teacher.objects.values_list('id', 'user__username', 'full_name', 'subject').order_by()
+    if teacher_ids is not None:
+        teachers = teachers.filter(id__in=teacher_ids)
+    for pk, username, full_name, subject in teachers.iterator(chunk_size=2000):
+        yield (TEACHER, pk), _words(username, full_name), f"{full_name} ({subject})"
+
+
+PROFILE_URLS = {STUDENT: 'student_profile', TEACHER: 'teacher_profile'}
+
+
+@lru_cache(maxsize=4096)
+def _profile_url(kind, pk):
+    return reverse(PROFILE_URLS[kind], args=[pk])
+
+
+class PrefixIndex:
+    """Sorted ``(key, kind, id)`` list plus the keys and label of every entry."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys = []
+        self._entries = {}
+        self.loaded_at = None
+
+    @property
+    def loaded(self):
+        return self.loaded_at is not None
+
+    def load(self):
+        keys = []
+        entries = {}
+        for source in (_student_entries(), _teacher_entries()):
+            for ident, entry_keys, label in source:
+                entries[ident] = (entry_keys, label)
+                keys.extend((key, *ident) for key in entry_keys)
+        keys.sort()
+        with self._lock:
+            self._keys = keys
+            self._entries = entries
+            self.loaded_at = time.monotonic()
+
+    def _ensure_loaded(self):
+        if not self.loaded or time.monotonic() - self.loaded_at > MAX_AGE:
+            self.load()
+
+    def _remove(self, ident):
+        entry = self._entries.pop(ident, None)
+        if entry is None:
+            return
+        for key in entry[0]:
+            position = bisect_left(self._keys, (key, *ident))
+            if position < len(self._keys) and self._keys[position] == (key, *ident):
+                del self._keys[position]
+
+    def _put(self, ident, keys, label):
+        self._remove(ident)
+        self._entries[ident] = (keys, label)
+        for key in keys:
+            insort(self._keys, (key, *ident))
+
+    def refresh(self, kind, ids):
+        """Re-read the given students/teachers; ids no longer in the database are dropped."""
+        ids = set(ids)
+        if not ids or not self.loaded:
+            # Nothing to keep current until the first lookup builds the index
+            return
+        source = _student_entries(ids) if kind == STUDENT else _teacher_entries(ids)
+        fresh = {ident: (keys, label) for ident, keys, label in source}
+        with self._lock:
+            for pk in ids:
+                ident = (kind, pk)
+                if ident in fresh:
+                    self._put(ident, *fresh[ident])
+                else:
+                    self._remove(ident)
+
+    def lookup(self, query, kind=None, limit=DEFAULT_LIMIT):
+        """
+        ``{'type', 'id', 'label', 'url'}`` dicts of the entries with a key
+        starting with ``query``.
+        """
+        prefix = ' '.join(query.lower().split())
+        if not prefix:
+            return []
+        self._ensure_loaded()
+
+        results = []
+        seen = set()
+        with self._lock:
+            position = bisect_left(self._keys, (prefix,))
+            while position < len(self._keys) and len(results) < limit:
+                key, entry_kind, pk = self._keys[position]
+                if not key.startswith(prefix):
+                    break
+                position += 1
+                ident = (entry_kind, pk)
+                if ident in seen or (kind and entry_kind != kind):
+                    continue
+                seen.add(ident)
+                results.append({
+                    'type': entry_kind,
+                    'id': pk,
+                    'label': self._entries[ident][1],
+                    'url': _profile_url(entry_kind, pk),
+                })
+        return results
+
+
+directory_index = PrefixIndex()
+
+
+def autocomplete(query, kind=None, limit=DEFAULT_LIMIT):
+    return directory_index.lookup(query, kind, limit)
+
+
+def refresh_students(student_ids):
+    directory_index.refresh(STUDENT, student_ids)
+
+
+def refresh_teachers(teacher_ids):
+    directory_index.refresh(TEACHER, teacher_ids)
+
+
+def refresh_user(user_id):
+    """Re-read the student/teacher of a user whose name changed."""
+    if directory_index.loaded:
+        refresh_students(Student.objects.filter(user_id=user_id).values_list('id', flat=True))
+        refresh_teachers(Teacher.objects.filter(user_id=user_id).values_list('id', flat=True))
+
+
+def refresh_classroom(classroom_id):
+    """Re-read the students of a renamed classroom (their labels show it)."""
+    if directory_index.loaded:
+        refresh_students(Student.objects.filter(classroom_id=classroom_id).values_list('id', flat=True))
@@ -0,0 +1,43 @@
+"""
+Compact encoding of one day of attendance for a group of students.
+
+A day is stored as two blobs:
+
+* ``students`` - the marked student ids, sorted, packed as little-endian
+  unsigned 32-bit integers;
+* ``present`` - one bit per entry of ``students`` (bit set = Present).
+
+A 60-student class costs 248 bytes per day instead of 60 rows plus their
+index entries.
+"""
+import struct
+
+
+def encode_statuses(statuses):
+    """
+    Encode ``{student_id: 'Present' | 'Absent'}`` into
+    ``(students_blob, present_blob)``.
+    """
+    student_ids = sorted(statuses)
+    students = struct.pack(f'<{len(student_ids)}I', *student_ids)
+
+    present = bytearray((len(student_ids) + 7) // 8)
+    for index, student_id in enumerate(student_ids):
+        if statuses[student_id] == 'Present':
+            present[index >> 3] |= 1 << (index & 7)
+
+    return students, bytes(present)
+
+
+def decode_student_ids(students):
+    students = bytes(students)
+    return struct.unpack(f'<{len(students) // 4}I', students)
+
+
+def decode_statuses(students, present):
+    """Inverse of encode_statuses: ``{student_id: status}``."""
+    present = bytes(present)
+    return {
+        student_id: 'Present' if present[index >> 3] >> (index & 7) & 1 else 'Absent'
+        for index, student_id in enumerate(decode_student_ids(students))
+    }
@@ -1,14 +1,14 @@
-from .models import Notification
+from .live import POLL_INTERVAL, streaming_supported
+from .utils import is_admin, is_teacher, is_student, get_unread_count
 
 def notification_count(request):
-    if request.user.is_authenticated:
-        count = Notification.objects.filter(
-            user = request.user,
-            is_read = False
-        ).count()
-    else:
-        count = 0
-    return {'notification_count': count}
+    # Read the denormalized counter (one indexed row) instead of COUNT(*)
+    return {
+        'notification_count': get_unread_count(request.user),
+        # Live badge: a stream under ASGI, polling otherwise (see school/live.py)
+        'notification_stream': streaming_supported(request),
+        'notification_poll_interval': POLL_INTERVAL,
+    }
 
 
 def user_roles(request):
@@ -19,13 +19,11 @@ def user_roles(request):
         # True if the user is authenticated and either:
         # - a Django superuser, or
         # - belongs to the 'Admin' group
-        'is_admin': user.is_authenticated and (
-            user.is_superuser or user.groups.filter(name='Admin').exists()
-        ),
+        'is_admin': is_admin(user),
         # True if the user is authenticated and belongs to the 'Teacher' group
-        'is_teacher': user.is_authenticated and user.groups.filter(name='Teacher').exists(),
+        'is_teacher': is_teacher(user),
          # True if the user is authenticated and belongs to the 'Student' group
-        'is_student': user.is_authenticated and user.groups.filter(name='Student').exists(),
+        'is_student': is_student(user),
     }
 
 """
@@ -33,6 +31,8 @@ def user_roles(request):
 
     This function checks whether the authenticated user belongs to
     specific Django groups (Admin, Teacher, Student) or has superuser privileges.
+    The group names come from ``get_user_roles``, so all three checks share
+    one cached lookup.
 
     The returned dictionary is automatically available in all templates,
     allowing role-based UI rendering (menus, buttons, permissions).
@@ -1,8 +1,8 @@
 from django.http import HttpResponseForbidden
 # Used to return a 403 Forbidden response when access is denied
 
-from .utils import is_admin, is_teacher, is_student
-# Utility functions to check user roles based on groups
+from .utils import is_admin, is_teacher, is_student, is_admin_or_teacher
+# Utility functions to check user roles based on groups (cached per request)
 
 
 def admin_only(view_func):
@@ -60,7 +60,7 @@ def admin_or_teacher_only(view_func):
 
     def wrapper(request, *args, **kwargs):
         # Check if user belongs to Admin or Teacher group
-        if request.user.groups.filter(name__in=['Admin', 'Teacher']).exists():
+        if is_admin_or_teacher(request.user):
             return view_func(request, *args, **kwargs)
 
         # Block access for all other users
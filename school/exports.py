@@ -0,0 +1,171 @@
+"""
+Streaming CSV exports.
+
+Every export is a generator of CSV lines fed to a StreamingHttpResponse.
+Rows come from ``values_list`` projections read with
+``.iterator(chunk_size=...)``, so memory stays flat however many rows are
+exported. Attendance merges the live rows with the compacted bitmaps by
+date (both streams are already sorted, see ``heapq.merge``).
+
+Filters (all optional): ``classroom`` for every export, ``start``/``end``
+for attendance and fees (fee creation date) and ``status`` (``paid`` /
+``pending``) for fees.
+
+Under ASGI Django would drain a plain generator into a list before sending
+it, so the view wraps it in ``async_lines``, which pulls ``CHUNK_SIZE``
+lines at a time on the sync thread and keeps the memory flat there too.
+"""
+import csv
+import heapq
+from itertools import groupby, islice
+
+from asgiref.sync import sync_to_async
+
+from .analytics import SUBJECTS
+from .bitmaps import decode_statuses
+from .models import Attendance, AttendanceBitmap, Fee, Result, Student
+
+CHUNK_SIZE = 2000
+
+# Query value -> Fee.status as stored
+FEE_STATUSES = {'paid': 'paid', 'pending': 'panding'}
+
+
+class _Echo:
+    """File-like object whose ``write`` hands the line back to csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(header, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _take(lines, count):
+    return list(islice(lines, count))
+
+
+async def async_lines(lines):
+    """
+    Async iterator over the ``lines`` generator. Every chunk is read on the
+    same sync thread (``thread_sensitive``), where the query cursor lives.
+    """
+    take = sync_to_async(_take)
+    while chunk := await take(lines, CHUNK_SIZE):
+        for line in chunk:
+            yield line
+
+
+def export_students(classroom_id=None, **filters):
+    students = Student.objects.order_by('roll_number')
+    if classroom_id:
+        students = students.filter(classroom_id=classroom_id)
+    rows = students.values_list(
+        'roll_number', 'user__username', 'user__first_name', 'user__last_name',
+        'classroom__class_name', 'classroom__section', 'gender', 'date_of_birth', 'address'
+    )
+    header = ['roll_number', 'username', 'first_name', 'last_name',
+              'class', 'section', 'gender', 'date_of_birth', 'address']
+    return csv_lines(header, rows.iterator(chunk_size=CHUNK_SIZE))
+
+
+def export_results(classroom_id=None, **filters):
+    results = Result.objects.order_by('student__roll_number')
+    if classroom_id:
+        results = results.filter(student__classroom_id=classroom_id)
+    rows = results.values_list(
+        'student__roll_number', 'student__user__username',
+        'student__classroom__class_name', 'student__classroom__section',
+        *[field for field, _ in SUBJECTS], 'total', 'per', 'grade'
+    )
+    header = ['roll_number', 'username', 'class', 'section',
+              *[name for _, name in SUBJECTS], 'total', 'percentage', 'grade']
+    return csv_lines(header, rows.iterator(chunk_size=CHUNK_SIZE))
+
+
+def export_fees(classroom_id=None, start=None, end=None, status=None, **filters):
+    fees = Fee.objects.order_by('student__roll_number', 'created_at', 'id')
+    if classroom_id:
+        fees = fees.filter(student__classroom_id=classroom_id)
+    if start:
+        fees = fees.filter(created_at__gte=start)
+    if end:
+        fees = fees.filter(created_at__lte=end)
+    if status in FEE_STATUSES:
+        fees = fees.filter(status=FEE_STATUSES[status])
+    rows = (
+        (roll, username, class_name, section, amount, paid, max(amount - paid, 0),
+         'pending' if stored == 'panding' else stored, payment_date, created_at, remarks)
+        for roll, username, class_name, section, amount, paid, stored, payment_date, created_at, remarks
+        in fees.values_list(
+            'student__roll_number', 'student__user__username',
+            'student__classroom__class_name', 'student__classroom__section',
+            'amount', 'paid_amount', 'status', 'payment_date', 'created_at', 'remarks'
+        ).iterator(chunk_size=CHUNK_SIZE)
+    )
+    header = ['roll_number', 'username', 'class', 'section', 'amount', 'paid', 'due',
+              'status', 'payment_date', 'created_at', 'remarks']
+    return csv_lines(header, rows)
+
+
+def _bitmap_rows(bitmaps):
+    """Attendance rows of compacted days, by date then roll number."""
+    students = {}
+    for bitmap in bitmaps.iterator(chunk_size=100):
+        statuses = decode_statuses(bitmap.students, bitmap.present)
+        missing = [student_id for student_id in statuses if student_id not in students]
+        if missing:
+            students.update(
+                (pk, (roll, username, class_name, section))
+                for pk, roll, username, class_name, section in Student.objects.filter(id__in=missing)
+                .values_list('id', 'roll_number', 'user__username',
+                             'classroom__class_name', 'classroom__section')
+            )
+        rows = [
+            (bitmap.date, *students[student_id], status)
+            for student_id, status in statuses.items()
+            if student_id in students
+        ]
+        rows.sort(key=lambda row: row[1])
+        yield from rows
+
+
+def export_attendance(classroom_id=None, start=None, end=None, **filters):
+    rows = Attendance.objects.order_by('date', 'student__roll_number')
+    bitmaps = AttendanceBitmap.objects.order_by('date', 'classroom_id').only('date', 'students', 'present')
+    if classroom_id:
+        rows = rows.filter(student__classroom_id=classroom_id)
+        bitmaps = bitmaps.filter(classroom_id=classroom_id)
+    if start:
+        rows = rows.filter(date__gte=start)
+        bitmaps = bitmaps.filter(date__gte=start)
+    if end:
+        rows = rows.filter(date__lte=end)
+        bitmaps = bitmaps.filter(date__lte=end)
+
+    live = rows.values_list(
+        'date', 'student__roll_number', 'student__user__username',
+        'student__classroom__class_name', 'student__classroom__section', 'status'
+    ).iterator(chunk_size=CHUNK_SIZE)
+
+    # Both streams are sorted by date; within a day order by roll number
+    merged = heapq.merge(live, _bitmap_rows(bitmaps), key=lambda row: row[0])
+    ordered = (
+        row
+        for _, day_rows in groupby(merged, key=lambda row: row[0])
+        for row in sorted(day_rows, key=lambda row: row[1])
+    )
+    header = ['date', 'roll_number', 'username', 'class', 'section', 'status']
+    return csv_lines(header, ordered)
+
+
+EXPORTS = {
+    'students': export_students,
+    'results': export_results,
+    'fees': export_fees,
+    'attendance': export_attendance,
+}
@@ -0,0 +1,178 @@
+"""
+Notification fan-out.
+
+``notify`` sends one notification to an audience: users, groups (by
+name), the students of classrooms, or the whole school. Recipients are
+written in chunks of ``CHUNK_SIZE`` with one ``bulk_create`` and one
+unread-counter UPDATE per chunk.
+
+Audiences up to ``INLINE_LIMIT`` users are written during the request.
+Larger ones are stored as a NotificationFanout and handed to a background
+thread once the request's transaction commits, so posting a notice to the
+whole school returns straight away. Each chunk records the last recipient
+written, so a delivery cut short (e.g. by a restart) resumes where it
+stopped: the next fan-out wakes the worker, which drains everything still
+pending, and ``manage.py send_notifications`` does the same from cron.
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils.timezone import now
+
+from .live import publish
+from .models import Notification, NotificationFanout
+from .utils import adjust_unread_counts
+
+logger = logging.getLogger(__name__)
+
+# Audiences up to this many users are written during the request
+INLINE_LIMIT = getattr(settings, 'SCHOOL_FANOUT_INLINE_LIMIT', 200)
+
+# Notifications written per transaction
+CHUNK_SIZE = getattr(settings, 'SCHOOL_FANOUT_CHUNK_SIZE', 1000)
+
+# Deliver large fan-outs from a thread of the web process; when False they
+# wait for ``manage.py send_notifications``
+BACKGROUND = getattr(settings, 'SCHOOL_FANOUT_BACKGROUND', True)
+
+_wakeup = threading.Event()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def make_audience(users=(), groups=(), classrooms=(), school=False, exclude=()):
+    """
+    JSON-able audience: user ids, group names, classroom ids (their
+    students), or ``school`` for every active user; minus ``exclude``.
+    """
+    return {
+        'users': sorted({int(user) for user in users}),
+        'groups': sorted(set(groups)),
+        'classrooms': sorted({int(classroom) for classroom in classrooms}),
+        'school': bool(school),
+        'exclude': sorted({int(user) for user in exclude}),
+    }
+
+
+def audience_users(audience):
+    """Active users of an audience (see make_audience), by id."""
+    users = User.objects.filter(is_active=True)
+    if not audience.get('school'):
+        match = Q(pk__in=audience.get('users', []))
+        if audience.get('groups'):
+            match |= Q(pk__in=User.objects.filter(groups__name__in=audience['groups']).values('pk'))
+        if audience.get('classrooms'):
+            match |= Q(student__classroom_id__in=audience['classrooms'])
+        users = users.filter(match)
+    if audience.get('exclude'):
+        users = users.exclude(pk__in=audience['exclude'])
+    return users.order_by('pk')
+
+
+def _write_chunk(user_ids, title, message):
+    Notification.objects.bulk_create(
+        [Notification(user_id=user_id, title=title, message=message) for user_id in user_ids]
+    )
+    adjust_unread_counts(user_ids, 1)
+    publish({user_id: [title] for user_id in user_ids})
+
+
+def deliver(fanout):
+    """
+    Write the notifications of a fan-out still missing, chunk by chunk.
+    Each chunk is claimed first by moving ``last_user_id`` with a
+    conditional UPDATE in the same transaction, so the worker thread and
+    ``send_notifications`` running at once never write the same chunk.
+    Returns the number written by this call.
+    """
+    written = 0
+    recipients = audience_users(fanout.audience).values_list('pk', flat=True)
+    while fanout.sent_at is None:
+        start = fanout.last_user_id
+        chunk = list(recipients.filter(pk__gt=start)[:CHUNK_SIZE])
+        last_user_id = chunk[-1] if chunk else start
+        sent_at = now() if len(chunk) < CHUNK_SIZE else None
+        with transaction.atomic():
+            claimed = NotificationFanout.objects.filter(
+                pk=fanout.pk, last_user_id=start, sent_at__isnull=True
+            ).update(
+                last_user_id=last_user_id,
+                recipients=F('recipients') + len(chunk),
+                sent_at=sent_at
+            )
+            if claimed and chunk:
+                _write_chunk(chunk, fanout.title, fanout.message)
+
+        if not claimed:
+            # Another worker wrote this chunk: carry on from where it got to
+            fanout.refresh_from_db(fields=['last_user_id', 'recipients', 'sent_at'])
+            continue
+        fanout.last_user_id = last_user_id
+        fanout.recipients += len(chunk)
+        fanout.sent_at = sent_at
+        written += len(chunk)
+    return written
+
+
+def deliver_pending():
+    """Deliver every queued fan-out, oldest first. Returns the notifications written."""
+    written = 0
+    while True:
+        fanout = NotificationFanout.objects.filter(sent_at__isnull=True).order_by('id').first()
+        if fanout is None:
+            return written
+        written += deliver(fanout)
+
+
+def notify(title, message, users=(), groups=(), classrooms=(), school=False, sender=None):
+    """
+    Send a notification to an audience (see make_audience); ``sender``
+    does not get a copy. Small audiences are written now and the number of
+    recipients is returned; larger ones are queued and the
+    NotificationFanout is returned.
+    """
+    audience = make_audience(users, groups, classrooms, school, exclude=[sender.pk] if sender else ())
+    title = title[:Notification._meta.get_field('title').max_length]
+    recipients = audience_users(audience).values_list('pk', flat=True)
+
+    first = list(recipients[:INLINE_LIMIT + 1])
+    if len(first) <= INLINE_LIMIT:
+        if first:
+            with transaction.atomic():
+                _write_chunk(first, title, message)
+        return len(first)
+
+    fanout = NotificationFanout.objects.create(
+        title=title, message=message, audience=audience, created_by=sender
+    )
+    if BACKGROUND:
+        transaction.on_commit(wake_worker)
+    return fanout
+
+
+def wake_worker():
+    """Start the delivery thread if needed and let it drain the queue."""
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run_worker, name='notification-fanout', daemon=True)
+            _worker.start()
+    _wakeup.set()
+
+
+def _run_worker():
+    while True:
+        _wakeup.wait()
+        _wakeup.clear()
+        close_old_connections()
+        try:
+            deliver_pending()
+        except Exception:
+            # Left pending: retried on the next wake-up or by send_notifications
+            logger.exception("Notification fan-out failed")
+        finally:
+            connection.close()
@@ -0,0 +1,294 @@
+"""
+Fee ledger and running balances.
+
+A Fee is one installment billed to a student; FeePayment rows are the
+payments made towards it and ``Fee.paid_amount`` is their sum. Every Fee
+write is turned into ``(student_id, classroom_id, billed, paid, due)``
+deltas on the student's FeeBalance and the classroom's ClassFeeBalance
+(``UPDATE ... SET due = due + n``, like the attendance rollups), so the
+dues report reads balances instead of summing installments per student.
+
+``due`` counts the unpaid part of each installment (an overpaid
+installment counts 0), the same figure as the dashboard's outstanding fees.
+
+A new term is billed to whole classrooms at once by generate_term_fees
+(the ``generate_term_fees`` command and the Generate Fees page).
+"""
+import time
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Greatest
+
+from .models import ClassFeeBalance, Fee, FeeBalance, FeePayment, Student
+from .stats import adjust_stats, outstanding
+
+BATCH_SIZE = 500
+
+# Dues report ``status`` filter -> FeeBalance lookup
+DUES_STATUSES = {
+    'pending': {'due__gt': 0},
+    'paid': {'due': 0},
+}
+
+
+def fee_delta(student_id, classroom_id, previous, current):
+    """
+    Balance delta of one installment going from ``previous`` to ``current``
+    ``(amount, paid_amount)`` (None for a created / deleted installment).
+    """
+    old_amount, old_paid = previous or (0, 0)
+    new_amount, new_paid = current or (0, 0)
+    return (
+        student_id,
+        classroom_id,
+        new_amount - old_amount,
+        new_paid - old_paid,
+        outstanding(new_amount, new_paid) - outstanding(old_amount, old_paid),
+    )
+
+
+def _add(model, key, totals, defaults=None):
+    """
+    Create the missing balance rows of ``model`` (with ``defaults[pk]``
+    fields) then move them by ``totals``.
+    """
+    defaults = defaults or {}
+    # (billed, paid, due) delta -> ids sharing it, one UPDATE per group
+    groups = defaultdict(list)
+    for pk, delta in totals.items():
+        if any(delta):
+            groups[tuple(delta)].append(pk)
+
+    # Pure decrements never need a new row (e.g. removed with its student)
+    created = sorted(pk for pk, delta in totals.items() if max(delta) > 0)
+    for start in range(0, len(created), BATCH_SIZE):
+        chunk = created[start:start + BATCH_SIZE]
+        existing = set(
+            model.objects.filter(**{f'{key}__in': chunk}).values_list(key, flat=True)
+        )
+        model.objects.bulk_create(
+            [model(**{key: pk}, **defaults.get(pk, {})) for pk in chunk if pk not in existing],
+            ignore_conflicts=True
+        )
+
+    for (billed, paid, due), ids in groups.items():
+        for start in range(0, len(ids), BATCH_SIZE):
+            model.objects.filter(**{f'{key}__in': ids[start:start + BATCH_SIZE]}).update(
+                billed=F('billed') + billed,
+                paid=F('paid') + paid,
+                due=Greatest(F('due') + due, 0)
+            )
+
+
+def apply_fee_deltas(deltas):
+    """
+    Apply ``(student_id, classroom_id, billed, paid, due)`` deltas (see
+    fee_delta) to the student and classroom balances.
+    """
+    students = defaultdict(lambda: [0, 0, 0])
+    classrooms = defaultdict(lambda: [0, 0, 0])
+    classroom_of = {}
+    for student_id, classroom_id, *delta in deltas:
+        for totals in (students[student_id], classrooms[classroom_id]):
+            for index, value in enumerate(delta):
+                totals[index] += value
+        classroom_of[student_id] = classroom_id
+    classrooms.pop(None, None)
+
+    if not students:
+        return
+
+    with transaction.atomic():
+        _add(FeeBalance, 'student_id', students, {
+            student_id: {'classroom_id': classroom_id}
+            for student_id, classroom_id in classroom_of.items()
+        })
+        _add(ClassFeeBalance, 'classroom_id', classrooms)
+
+
+def move_fee_balance(student_id, previous_classroom_id, classroom_id):
+    """Carry a student's balance over to the classroom they moved to."""
+    balance = FeeBalance.objects.filter(student_id=student_id).values_list(
+        'billed', 'paid', 'due'
+    ).first()
+    with transaction.atomic():
+        FeeBalance.objects.filter(student_id=student_id).update(classroom_id=classroom_id)
+        if balance and any(balance):
+            totals = {}
+            if previous_classroom_id is not None:
+                totals[previous_classroom_id] = [-value for value in balance]
+            if classroom_id is not None:
+                totals[classroom_id] = list(balance)
+            _add(ClassFeeBalance, 'classroom_id', totals)
+
+
+def record_payment(fee, amount, paid_on=None, remarks='', recorded_by=None):
+    """
+    Record a payment towards an installment. ``Fee.paid_amount``,
+    ``status`` and ``payment_date`` follow, and the Fee signals move the
+    balances. Returns the FeePayment.
+    """
+    with transaction.atomic():
+        fee = Fee.objects.select_for_update().get(pk=fee.pk)
+        payment = FeePayment(fee=fee, amount=amount, remarks=remarks, recorded_by=recorded_by)
+        if paid_on:
+            payment.paid_on = paid_on
+        payment.save()
+
+        fee.paid_amount += amount
+        fee.payment_date = max(fee.payment_date or payment.paid_on, payment.paid_on)
+        fee.save(update_fields=['paid_amount', 'status', 'payment_date'])
+    return payment
+
+
+def delete_payment(payment):
+    """Remove a payment recorded by mistake and take it off its installment."""
+    with transaction.atomic():
+        fee = Fee.objects.select_for_update().get(pk=payment.fee_id)
+        payment.delete()
+        fee.paid_amount = max(fee.paid_amount - payment.amount, 0)
+        fee.payment_date = (
+            fee.payments.order_by('-paid_on').values_list('paid_on', flat=True).first()
+        )
+        fee.save(update_fields=['paid_amount', 'status', 'payment_date'])
+
+
+class FeeRun:
+    """Counters of one term fee generation."""
+
+    def __init__(self, term):
+        self.term = term
+        self.students = 0
+        self.created = 0
+        self.skipped = 0
+        self.billed = 0
+        self.elapsed = 0.0
+
+    def summary(self):
+        return (
+            f"'{self.term}': {self.created} fees billed ({self.billed} in total) "
+            f"to {self.students} students, {self.skipped} already billed, "
+            f"in {self.elapsed:.2f}s"
+        )
+
+
+def generate_term_fees(schedule, term, chunk_size=1000):
+    """
+    Bill one installment to every student of the scheduled classrooms.
+
+    ``schedule`` maps classroom id -> amount. The installment carries
+    ``term`` (also shown as its remarks); Fee is unique on (student, term),
+    so students already billed for it are skipped and a rerun only fills
+    the gaps. Each chunk of students is checked and written with one
+    ``bulk_create`` in its own transaction; ``status`` is set in the same
+    pass (``bulk_create`` does not call Fee.save) and the balances and the
+    dashboard total are moved explicitly (nor does it send post_save).
+    Returns a FeeRun.
+    """
+    run = FeeRun(term)
+    started = time.perf_counter()
+    schedule = {classroom_id: amount for classroom_id, amount in schedule.items() if amount is not None}
+
+    students = list(
+        Student.objects.filter(classroom_id__in=schedule)
+        .order_by('classroom_id', 'roll_number')
+        .values_list('id', 'classroom_id')
+    )
+    run.students = len(students)
+
+    for start in range(0, len(students), chunk_size):
+        chunk = students[start:start + chunk_size]
+        with transaction.atomic():
+            # Inside the write transaction, so a concurrent run cannot bill in between
+            billed = set(
+                Fee.objects.filter(term=term, student_id__in=[student_id for student_id, _ in chunk])
+                .values_list('student_id', flat=True)
+            )
+            chunk = [(student_id, classroom_id) for student_id, classroom_id in chunk if student_id not in billed]
+            fees = [
+                Fee(
+                    student_id=student_id,
+                    amount=schedule[classroom_id],
+                    paid_amount=0,
+                    status=Fee.status_for(schedule[classroom_id], 0),
+                    remarks=term,
+                    term=term,
+                )
+                for student_id, classroom_id in chunk
+            ]
+            Fee.objects.bulk_create(fees, batch_size=BATCH_SIZE)
+            apply_fee_deltas(
+                fee_delta(student_id, classroom_id, None, (schedule[classroom_id], 0))
+                for student_id, classroom_id in chunk
+            )
+            adjust_stats({'outstanding_fees': sum(fee.amount for fee in fees)})
+        run.skipped += len(billed)
+        run.created += len(fees)
+        run.billed += sum(fee.amount for fee in fees)
+
+    run.elapsed = time.perf_counter() - started
+    return run
+
+
+def dues_report(classroom_id=None, status=None):
+    """
+    ``(balances, totals)`` of the dues report: a queryset of FeeBalance
+    (with student, user and classroom) and the sums over it, filtered by
+    classroom and ``status`` (``pending`` / ``paid``).
+    """
+    balances = FeeBalance.objects.filter(billed__gt=0)
+    if classroom_id:
+        balances = balances.filter(classroom_id=classroom_id)
+    if status in DUES_STATUSES:
+        balances = balances.filter(**DUES_STATUSES[status])
+
+    totals = balances.aggregate(
+        students=Count('id'),
+        billed=Sum('billed'),
+        paid=Sum('paid'),
+        due=Sum('due'),
+    )
+    balances = balances.select_related('student__user', 'classroom')
+    return balances, totals
+
+
+def rebuild_fee_balances():
+    """Recompute every balance from the Fee table. Returns the number of students."""
+    per_student = (
+        Fee.objects
+        .values('student_id')
+        .annotate(
+            billed=Sum('amount'),
+            paid=Sum('paid_amount'),
+            due=Sum(Greatest(F('amount') - F('paid_amount'), 0)),
+        )
+        .order_by()
+    )
+    classroom_of = dict(Student.objects.values_list('id', 'classroom_id'))
+
+    balances = []
+    classes = defaultdict(lambda: [0, 0, 0])
+    for row in per_student.iterator(chunk_size=2000):
+        classroom_id = classroom_of.get(row['student_id'])
+        balances.append(FeeBalance(
+            student_id=row['student_id'], classroom_id=classroom_id,
+            billed=row['billed'], paid=row['paid'], due=row['due']
+        ))
+        if classroom_id is not None:
+            for index, field in enumerate(('billed', 'paid', 'due')):
+                classes[classroom_id][index] += row[field]
+
+    with transaction.atomic():
+        FeeBalance.objects.all().delete()
+        ClassFeeBalance.objects.all().delete()
+        FeeBalance.objects.bulk_create(balances, batch_size=BATCH_SIZE)
+        ClassFeeBalance.objects.bulk_create(
+            [
+                ClassFeeBalance(classroom_id=classroom_id, billed=billed, paid=paid, due=due)
+                for classroom_id, (billed, paid, due) in classes.items()
+            ],
+            batch_size=BATCH_SIZE
+        )
+    return len(balances)
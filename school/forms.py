@@ -1,5 +1,5 @@
 from django import forms
-from .models import Student, Teacher, Result, Fee, Assignment
+from .models import Student, Teacher, Result, Fee, FeePayment, Assignment
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 from django import forms
@@ -87,15 +87,54 @@ class ResultForm(forms.ModelForm):
         }
 
 class FeeForm(forms.ModelForm):
+    # Paid now, recorded as the installment's first FeePayment
+    paid_amount = forms.IntegerField(min_value=0, required=False)
+    payment_date = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+
     class Meta:
         model = Fee
         fields = [
             'amount',
-            'paid_amount',
-            'payment_date',
             'remarks'
         ]
 
+    def clean(self):
+        cleaned_data = super().clean()
+        amount = cleaned_data.get('amount')
+        paid = cleaned_data.get('paid_amount')
+        if amount is not None and paid and paid > amount:
+            raise forms.ValidationError("Paid amount cannot be more than the total fees")
+        return cleaned_data
+
+class FeePaymentForm(forms.ModelForm):
+    class Meta:
+        model = FeePayment
+        fields = [
+            'amount',
+            'paid_on',
+            'remarks'
+        ]
+        widgets = {
+            'paid_on': forms.DateInput(attrs={'type': 'date'}),
+            'remarks': forms.TextInput(),
+        }
+
+    def __init__(self, *args, fee=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fee = fee
+        self.fields['amount'].widget.attrs['min'] = 1
+        if fee is not None:
+            remaining = max(fee.amount - fee.paid_amount, 0)
+            self.fields['amount'].widget.attrs['max'] = remaining
+
+    def clean_amount(self):
+        amount = self.cleaned_data['amount']
+        if amount < 1:
+            raise forms.ValidationError("Enter an amount of at least 1")
+        if self.fee is not None and amount > self.fee.amount - self.fee.paid_amount:
+            raise forms.ValidationError("Payment is more than the amount still due")
+        return amount
+
 # school/forms.py
 
 class AssignmentForm(forms.ModelForm):
@@ -0,0 +1,20 @@
+"""
+Password hashing for process pools.
+
+Kept free of model imports: spawned workers import this module before
+Django is set up, and ``init_worker`` sets it up.
+"""
+import django
+from django.apps import apps
+
+
+def init_worker():
+    if not apps.ready:
+        django.setup()
+
+
+def hash_passwords(passwords):
+    """``make_password`` for a list; blank passwords become unusable ones."""
+    from django.contrib.auth.hashers import make_password
+
+    return [make_password(password or None) for password in passwords]
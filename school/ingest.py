@@ -0,0 +1,319 @@
+"""
+Streaming CSV imports.
+
+Files are parsed one line at a time straight from the file object, so
+memory stays bounded by the batch size no matter how long the file is.
+Lookups (roll numbers, usernames, classrooms) are preloaded once into
+dicts/sets and rows are written in bulk.
+
+Attendance logs (gate terminal exports)::
+
+    roll_number,date_or_timestamp[,status]
+
+``status`` defaults to Present (a gate punch means the student came in);
+``P``/``A``/``IN``/``ABSENT`` and similar spellings are understood. A header
+line is skipped.
+
+Students (header line required)::
+
+    username,password,roll_number,classroom,gender,date_of_birth,address
+
+``classroom`` is written as on screen (``10th - B``) or as its id.
+"""
+import csv
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .attendance import bulk_mark_attendance, invalidate_rosters
+from .autocomplete import refresh_students
+from .hashing import hash_passwords, init_worker
+from .models import ClassRoom, Student
+from .search import index_students
+from .stats import adjust_stats
+
+DATE_FORMATS = ('%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d', '%d/%m/%Y %H:%M', '%d/%m/%Y %H:%M:%S')
+
+STATUS_ALIASES = {
+    'present': 'Present', 'p': 'Present', 'in': 'Present', '1': 'Present',
+    'absent': 'Absent', 'a': 'Absent', '0': 'Absent',
+}
+
+
+class IngestReport:
+    """Counters and rejected lines of one ingestion run."""
+
+    def __init__(self, max_rejected=100):
+        self.lines = 0
+        self.accepted = 0
+        self.written = 0
+        self.rejected_count = 0
+        self.rejected = []
+        self.max_rejected = max_rejected
+        self.elapsed = 0.0
+
+    def reject(self, line_no, line, reason):
+        self.rejected_count += 1
+        if len(self.rejected) < self.max_rejected:
+            self.rejected.append((line_no, ','.join(line), reason))
+
+    @property
+    def lines_per_second(self):
+        return self.lines / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        return (
+            f"{self.lines} lines, {self.accepted} accepted, {self.written} rows written, "
+            f"{self.rejected_count} rejected in {self.elapsed:.2f}s "
+            f"({self.lines_per_second:,.0f} lines/s)"
+        )
+
+
+def parse_day(value):
+    value = value.strip()
+    moment = parse_datetime(value)
+    if moment:
+        return moment.date()
+    day = parse_date(value)
+    if day:
+        return day
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def ingest_attendance_log(lines, batch_size=2000, default_status='Present', max_rejected=100):
+    """
+    Ingest an iterable of CSV text lines (an open file works).
+    Returns an IngestReport.
+    """
+    report = IngestReport(max_rejected)
+    started = time.perf_counter()
+
+    students = dict(Student.objects.values_list('roll_number', 'id'))
+    batch = []
+
+    for line_no, row in enumerate(csv.reader(lines), 1):
+        report.lines += 1
+        if not row or not ''.join(row).strip():
+            continue
+
+        roll = row[0].strip()
+        if line_no == 1 and not roll.isdigit():
+            # Header line
+            continue
+
+        if len(row) < 2:
+            report.reject(line_no, row, "missing date")
+            continue
+        if not roll.isdigit():
+            report.reject(line_no, row, "invalid roll number")
+            continue
+
+        student_id = students.get(int(roll))
+        if student_id is None:
+            report.reject(line_no, row, "unknown roll number")
+            continue
+
+        day = parse_day(row[1])
+        if day is None:
+            report.reject(line_no, row, "invalid date")
+            continue
+
+        status = default_status
+        if len(row) > 2 and row[2].strip():
+            status = STATUS_ALIASES.get(row[2].strip().lower())
+            if status is None:
+                report.reject(line_no, row, "invalid status")
+                continue
+
+        batch.append((student_id, day, status))
+        report.accepted += 1
+        if len(batch) >= batch_size:
+            report.written += len(bulk_mark_attendance(batch))
+            batch = []
+
+    if batch:
+        report.written += len(bulk_mark_attendance(batch))
+
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+# =========================
+# Students
+# =========================
+STUDENT_COLUMNS = (
+    'username', 'password', 'roll_number', 'classroom',
+    'gender', 'date_of_birth', 'address',
+)
+GENDERS = {'male': 'Male', 'female': 'Female', 'm': 'Male', 'f': 'Female'}
+
+
+def _split(items, parts):
+    size = max(1, -(-len(items) // parts))
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def classroom_lookup():
+    """Classroom id by lower-cased name as on screen (``10th - b``) or by id."""
+    lookup = {}
+    for pk, class_name, section in ClassRoom.objects.values_list('id', 'class_name', 'section'):
+        lookup[str(pk)] = pk
+        for key in (f"{class_name} - {section}", f"{class_name}-{section}", f"{class_name} {section}"):
+            lookup[key.lower()] = pk
+    return lookup
+
+
+def _write_students(rows, hashes, group_id):
+    """Insert one chunk of validated rows; returns the classroom ids touched."""
+    with transaction.atomic():
+        users = User.objects.bulk_create([
+            User(username=row['username'], password=password)
+            for row, password in zip(rows, hashes)
+        ])
+        User.groups.through.objects.bulk_create([
+            User.groups.through(user_id=user.id, group_id=group_id)
+            for user in users
+        ])
+        students = Student.objects.bulk_create([
+            Student(
+                user=user,
+                roll_number=row['roll_number'],
+                classroom_id=row['classroom_id'],
+                class_label=row['class_label'],
+                gender=row['gender'],
+                date_of_birth=row['date_of_birth'],
+                address=row['address'],
+            )
+            for row, user in zip(rows, users)
+        ])
+        student_ids = [student.id for student in students]
+        index_students(student_ids)
+        transaction.on_commit(lambda: refresh_students(student_ids))
+        adjust_stats({'students': len(student_ids)})
+    return {row['classroom_id'] for row in rows}
+
+
+def import_students(lines, chunk_size=500, workers=None, max_rejected=100):
+    """
+    Import students from an iterable of CSV text lines.
+
+    Usernames and roll numbers are checked up front against preloaded sets
+    (and against earlier lines of the same file). Passwords of a chunk are
+    hashed across a process pool while the previous chunk is being written;
+    each chunk goes in with three ``bulk_create`` calls in one transaction.
+    Returns an IngestReport whose ``written`` is the number of students created.
+    """
+    report = IngestReport(max_rejected)
+    started = time.perf_counter()
+
+    usernames = set(User.objects.values_list('username', flat=True))
+    rolls = set(Student.objects.values_list('roll_number', flat=True))
+    classrooms = classroom_lookup()
+    labels = {classroom.pk: str(classroom) for classroom in ClassRoom.objects.all()}
+    group_id = Group.objects.get_or_create(name='Student')[0].id
+    touched = set()
+
+    def valid_rows():
+        reader = csv.DictReader(lines)
+        missing = [column for column in STUDENT_COLUMNS if column not in (reader.fieldnames or [])]
+        if missing:
+            report.reject(1, reader.fieldnames or [], f"missing columns: {', '.join(missing)}")
+            return
+
+        for line_no, raw in enumerate(reader, 2):
+            report.lines += 1
+            row = {key: (value or '').strip() for key, value in raw.items() if key}
+            line = [row.get(column, '') for column in STUDENT_COLUMNS]
+            line[1] = '***' if line[1] else ''
+
+            username = row['username']
+            if not username:
+                report.reject(line_no, line, "missing username")
+                continue
+            if username in usernames:
+                report.reject(line_no, line, "username already exists")
+                continue
+            if not row['roll_number'].isdigit():
+                report.reject(line_no, line, "invalid roll number")
+                continue
+            roll_number = int(row['roll_number'])
+            if roll_number in rolls:
+                report.reject(line_no, line, "roll number already exists")
+                continue
+            gender = GENDERS.get(row['gender'].lower())
+            if gender is None:
+                report.reject(line_no, line, "invalid gender")
+                continue
+            date_of_birth = parse_day(row['date_of_birth'])
+            if date_of_birth is None:
+                report.reject(line_no, line, "invalid date of birth")
+                continue
+            classroom_id = None
+            if row['classroom']:
+                classroom_id = classrooms.get(row['classroom'].lower())
+                if classroom_id is None:
+                    report.reject(line_no, line, "unknown classroom")
+                    continue
+
+            usernames.add(username)
+            rolls.add(roll_number)
+            report.accepted += 1
+            yield {
+                'username': username,
+                'password': row['password'],
+                'roll_number': roll_number,
+                'classroom_id': classroom_id,
+                'class_label': labels.get(classroom_id, ''),
+                'gender': gender,
+                'date_of_birth': date_of_birth,
+                'address': row['address'],
+            }
+
+    def chunks():
+        chunk = []
+        for row in valid_rows():
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    workers = workers or os.cpu_count() or 1
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=init_worker) as pool:
+        pending = None
+        for chunk in chunks():
+            # Start hashing this chunk, then write the previous one meanwhile
+            futures = [
+                pool.submit(hash_passwords, part)
+                for part in _split([row['password'] for row in chunk], workers)
+            ]
+            if pending:
+                touched |= _write_students(*pending, group_id)
+                report.written += len(pending[0])
+            hashes = [password for future in futures for password in future.result()]
+            pending = (chunk, hashes)
+
+        if pending:
+            touched |= _write_students(*pending, group_id)
+            report.written += len(pending[0])
+
+    # bulk_create skips post_save, so drop the affected rosters here
+    # (search indexes and the student count are updated per chunk in _write_students)
+    invalidate_rosters(*touched)
+
+    report.elapsed = time.perf_counter() - started
+    return report
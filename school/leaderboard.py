@@ -0,0 +1,99 @@
+"""
+Cached class rank and school percentile of every result.
+
+Class ranks come from ``RANK() OVER (PARTITION BY classroom ORDER BY total
+DESC)`` and are cached per classroom as ``{student_id: (rank, total)}``.
+The school-wide percentile uses a cached cumulative histogram of totals
+(at most 701 counts), so it is an index lookup too.
+
+Both are dropped when a result in the class changes (Result/Student
+signals and bulk_save_results) and rebuilt on the next read, for that
+classroom only.
+"""
+from collections import namedtuple
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Window
+from django.db.models.functions import Rank
+
+from .models import Result
+
+# Seconds a leaderboard stays cached (it is also dropped on every Result change)
+LEADERBOARD_CACHE_TIMEOUT = getattr(settings, 'SCHOOL_LEADERBOARD_CACHE_TIMEOUT', 600)
+
+# ``percentile``: share of the school's results with a total at or below this one
+Standing = namedtuple('Standing', ['rank', 'class_size', 'total', 'percentile'])
+
+_DISTRIBUTION_KEY = 'school:leaderboard:school'
+
+
+def _class_key(classroom_id):
+    return f"school:leaderboard:class:{classroom_id}"
+
+
+def class_leaderboard(classroom_id):
+    """Cached ``{student_id: (rank, total)}`` of one classroom."""
+    key = _class_key(classroom_id)
+    board = cache.get(key)
+    if board is None:
+        rows = (
+            Result.objects
+            .filter(student__classroom_id=classroom_id, total__isnull=False)
+            .annotate(rank=Window(
+                Rank(),
+                partition_by=[F('student__classroom_id')],
+                order_by=F('total').desc()
+            ))
+            .values_list('student_id', 'rank', 'total')
+        )
+        board = {student_id: (rank, total) for student_id, rank, total in rows}
+        cache.set(key, board, LEADERBOARD_CACHE_TIMEOUT)
+    return board
+
+
+def school_distribution():
+    """Cached cumulative counts: ``counts[t]`` results have a total <= t."""
+    counts = cache.get(_DISTRIBUTION_KEY)
+    if counts is None:
+        rows = list(
+            Result.objects.filter(total__isnull=False)
+            .values_list('total')
+            .annotate(n=Count('id'))
+            .order_by()
+        )
+        histogram = np.zeros(max((total for total, _ in rows), default=0) + 1, dtype=np.int64)
+        for total, n in rows:
+            histogram[max(total, 0)] += n
+        counts = np.cumsum(histogram).tolist()
+        cache.set(_DISTRIBUTION_KEY, counts, LEADERBOARD_CACHE_TIMEOUT)
+    return counts
+
+
+def percentile(total):
+    counts = school_distribution()
+    if total is None or not counts or not counts[-1]:
+        return None
+    at_or_below = counts[min(max(total, 0), len(counts) - 1)]
+    return round(at_or_below * 100 / counts[-1], 1)
+
+
+def get_standing(student):
+    """Standing of a student's result, or None without a result or class."""
+    if student.classroom_id is None:
+        return None
+    board = class_leaderboard(student.classroom_id)
+    entry = board.get(student.id)
+    if entry is None:
+        return None
+    rank, total = entry
+    return Standing(rank, len(board), total, percentile(total))
+
+
+def invalidate_leaderboards(*classroom_ids):
+    """Drop the leaderboards of the given classrooms and the school distribution."""
+    cache.delete_many(
+        [_class_key(classroom_id) for classroom_id in set(classroom_ids) if classroom_id is not None]
+        + [_DISTRIBUTION_KEY]
+    )
@@ -0,0 +1,137 @@
+"""
+Live notification count (Server-Sent Events).
+
+Browsers keep one ``EventSource`` open on ``notifications/stream/``. The
+stream is an async generator served through ``home/asgi.py``: an idle
+connection is an ``asyncio.Queue`` waiting on the event loop, not a thread
+or a database connection.
+
+The in-process pub/sub maps user id -> subscriber queues. Whoever writes
+notifications or moves an unread counter (utils.create_notification's
+buffer, the fan-out worker, mark read / delete) calls ``publish`` with the
+new titles per user; after the transaction commits, the unread counts of
+the users that have a stream open are read in one query and pushed to
+their queues (thread-safe, whichever thread published).
+
+Only writes made by the same process reach its streams; with several
+server processes a browser still gets the right count each time its
+stream (re)connects. A stream ends after ``MAX_AGE`` seconds and the
+browser reconnects, so no connection is held for good.
+
+Under WSGI (``runserver``, gunicorn sync workers) a stream would hold a
+worker thread for as long as it is open, so it is only offered when the
+request came through ASGI; otherwise the page polls the count every
+``POLL_INTERVAL`` seconds instead.
+"""
+import asyncio
+import json
+import threading
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+
+from .models import UnreadNotificationCount
+
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT = getattr(settings, 'SCHOOL_LIVE_HEARTBEAT', 25)
+
+# Seconds a stream stays open before the browser is made to reconnect
+MAX_AGE = getattr(settings, 'SCHOOL_LIVE_MAX_AGE', 300)
+
+# Seconds between unread count requests when streams are not available
+POLL_INTERVAL = getattr(settings, 'SCHOOL_LIVE_POLL_INTERVAL', 60)
+
+# Events kept per stream for a slow client; older ones are dropped (each
+# event carries the full count, so only titles can be missed)
+QUEUE_SIZE = 50
+
+# Milliseconds the browser waits before reconnecting
+RETRY = 5000
+
+_subscribers = {}
+_lock = threading.Lock()
+
+
+def streaming_supported(request):
+    """True when ``request`` is served through ASGI, where idle streams are cheap."""
+    return isinstance(request, ASGIRequest)
+
+
+def subscribe(user_id):
+    """Register a stream of ``user_id`` on the running event loop."""
+    queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    entry = (asyncio.get_running_loop(), queue)
+    with _lock:
+        _subscribers.setdefault(user_id, set()).add(entry)
+    return entry
+
+
+def unsubscribe(user_id, entry):
+    with _lock:
+        entries = _subscribers.get(user_id)
+        if entries is not None:
+            entries.discard(entry)
+            if not entries:
+                del _subscribers[user_id]
+
+
+def _put(queue, event):
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(event)
+
+
+def _send(titles_by_user):
+    with _lock:
+        targets = {
+            user_id: list(_subscribers[user_id])
+            for user_id in titles_by_user
+            if user_id in _subscribers
+        }
+    if not targets:
+        return
+
+    counts = dict(
+        UnreadNotificationCount.objects.filter(user_id__in=targets).values_list('user_id', 'count')
+    )
+    for user_id, entries in targets.items():
+        event = {'unread': max(counts.get(user_id, 0), 0), 'titles': titles_by_user[user_id]}
+        for loop, queue in entries:
+            loop.call_soon_threadsafe(_put, queue, event)
+
+
+def publish(titles_by_user):
+    """
+    Push the unread count (and the titles of new notifications) to the
+    open streams of ``{user_id: [title, ...]}`` once the current
+    transaction commits. Costs nothing when none of them is connected.
+    """
+    titles_by_user = {user_id: list(titles) for user_id, titles in titles_by_user.items() if user_id}
+    if titles_by_user:
+        transaction.on_commit(lambda: _send(titles_by_user))
+
+
+def _event(data):
+    return f"event: unread\ndata: {json.dumps(data)}\n\n"
+
+
+async def event_stream(user_id, unread):
+    """
+    SSE lines for one browser: the current count, then every change for
+    ``MAX_AGE`` seconds.
+    """
+    entry = subscribe(user_id)
+    loop, queue = entry
+    deadline = loop.time() + MAX_AGE
+    try:
+        yield f"retry: {RETRY}\n" + _event({'unread': unread, 'titles': []})
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                event = await asyncio.wait_for(queue.get(), min(HEARTBEAT, remaining))
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield _event(event)
+    finally:
+        unsubscribe(user_id, entry)
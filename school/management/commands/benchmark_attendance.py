@@ -0,0 +1,88 @@
+import time
+import uuid
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from school.attendance import bulk_mark_attendance
+from school.models import Attendance, Student
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the per-student update_or_create loop with the bulk attendance "
+        "engine. Works on throw-away students inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=1000,
+                            help="Number of temporary students to mark (default 1000).")
+
+    def handle(self, *args, **options):
+        size = options['students']
+        try:
+            with transaction.atomic():
+                students = self._make_students(size)
+                timings = self._run(students)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        self.stdout.write(f"{'path':<28}{'insert':>12}{'update':>12}   (ms per 1,000 students)")
+        for name, (insert, update) in timings.items():
+            self.stdout.write(
+                f"{name:<28}{insert * 1000 / size * 1000:>12.1f}{update * 1000 / size * 1000:>12.1f}"
+            )
+
+    def _make_students(self, size):
+        tag = uuid.uuid4().hex[:8]
+        users = User.objects.bulk_create(
+            [User(username=f"bench-{tag}-{i}", password='!') for i in range(size)]
+        )
+        first_roll = (Student.objects.aggregate(top=Max('roll_number'))['top'] or 0) + 1
+        return Student.objects.bulk_create([
+            Student(
+                user=user,
+                roll_number=first_roll + i,
+                gender='Male',
+                date_of_birth=date(2010, 1, 1),
+                address='benchmark'
+            )
+            for i, user in enumerate(users)
+        ])
+
+    def _run(self, students):
+        # Far-future days so no real attendance is touched
+        loop_day = date(2999, 1, 1)
+        bulk_day = loop_day + timedelta(days=1)
+
+        def loop(status):
+            for student in students:
+                Attendance.objects.update_or_create(
+                    student=student,
+                    date=loop_day,
+                    defaults={'status': status}
+                )
+
+        def bulk(status):
+            bulk_mark_attendance((student.id, bulk_day, status) for student in students)
+
+        timings = {}
+        for name, mark in (('update_or_create loop', loop), ('bulk_mark_attendance', bulk)):
+            start = time.perf_counter()
+            mark('Present')
+            inserted = time.perf_counter() - start
+
+            start = time.perf_counter()
+            mark('Absent')
+            updated = time.perf_counter() - start
+
+            timings[name] = (inserted, updated)
+        return timings
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from school.attendance import compact_day
+from school.models import Attendance
+
+
+class Command(BaseCommand):
+    help = (
+        "Move attendance rows of a closed term (every day before --before) into "
+        "one compact bitmap per classroom and day."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', required=True,
+                            help="First day that stays as rows (YYYY-MM-DD), e.g. the start of the current term.")
+
+    def handle(self, *args, **options):
+        before = parse_date(options['before'])
+        if before is None:
+            raise CommandError("--before must be a date in YYYY-MM-DD format.")
+
+        days = list(
+            Attendance.objects.filter(date__lt=before, student__classroom__isnull=False)
+            .values_list('date', flat=True)
+            .distinct()
+            .order_by('date')
+        )
+
+        started = time.perf_counter()
+        moved = 0
+        for day in days:
+            moved += compact_day(day)
+            if options['verbosity'] > 1:
+                self.stdout.write(f"{day}: compacted")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Compacted {moved} rows over {len(days)} days "
+            f"in {time.perf_counter() - started:.1f}s."
+        ))
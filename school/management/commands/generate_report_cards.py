@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from school.reportcards import generate_report_cards
+
+
+class Command(BaseCommand):
+    help = (
+        "Render printable HTML report cards for every student into "
+        "MEDIA_ROOT/report_cards/<batch>/ with one zip per classroom. "
+        "Rerunning the same batch resumes and skips the cards already written."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', default=None,
+                            help="Output folder name, e.g. term-1-2026 (default: today's date).")
+        parser.add_argument('--title', default='',
+                            help="Heading printed on every card (default: the batch name).")
+        parser.add_argument('--classroom', type=int, action='append', dest='classrooms',
+                            help="Only this classroom id (may be repeated).")
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Rendering processes (default: CPU count).")
+        parser.add_argument('--force', action='store_true',
+                            help="Re-render cards that already exist.")
+
+    def handle(self, *args, **options):
+        def progress(run, pending):
+            self.stdout.write(f"{run.rendered}/{pending} cards rendered")
+
+        run = generate_report_cards(
+            classroom_ids=options['classrooms'],
+            batch=options['batch'],
+            title=options['title'],
+            workers=options['workers'],
+            force=options['force'],
+            progress=progress if options['verbosity'] > 1 else None,
+        )
+        for path in run.archives:
+            self.stdout.write(path)
+        self.stdout.write(self.style.SUCCESS(run.summary()))
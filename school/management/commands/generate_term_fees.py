@@ -0,0 +1,66 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from school.fees import generate_term_fees
+from school.ingest import classroom_lookup
+from school.models import ClassRoom, Fee
+
+
+class Command(BaseCommand):
+    help = (
+        "Bill a term's fee to every student of the given classrooms. Reruns skip "
+        "students already billed for the term."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--term', required=True,
+                            help="Term label, at most 50 characters (e.g. 'Term 2 2026').")
+        parser.add_argument('--amount', type=int,
+                            help="Amount for every classroom given with --classroom (default: all).")
+        parser.add_argument('--classroom', action='append', dest='classrooms',
+                            help="Classroom as on screen ('10th - B') or its id (can be repeated).")
+        parser.add_argument('--schedule',
+                            help="CSV of classroom,amount lines; overrides --amount for those classes.")
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help="Fees written per transaction (default 1000).")
+
+    def handle(self, *args, **options):
+        lookup = classroom_lookup()
+
+        def resolve(name):
+            classroom_id = lookup.get(name.strip().lower())
+            if classroom_id is None:
+                raise CommandError(f"Unknown classroom: {name}")
+            return classroom_id
+
+        schedule = {}
+        if options['amount'] is not None:
+            if options['amount'] < 0:
+                raise CommandError("--amount cannot be negative")
+            classroom_ids = (
+                [resolve(name) for name in options['classrooms']]
+                if options['classrooms']
+                else ClassRoom.objects.values_list('id', flat=True)
+            )
+            schedule.update((classroom_id, options['amount']) for classroom_id in classroom_ids)
+
+        if options['schedule']:
+            try:
+                with open(options['schedule'], newline='', encoding='utf-8-sig') as source:
+                    for line_no, row in enumerate(csv.reader(source), 1):
+                        if not row or (line_no == 1 and row[0].strip().lower() == 'classroom'):
+                            continue
+                        if len(row) != 2 or not row[1].strip().isdigit():
+                            raise CommandError(f"line {line_no}: expected classroom,amount")
+                        schedule[resolve(row[0])] = int(row[1])
+            except OSError as e:
+                raise CommandError(f"Cannot open {options['schedule']}: {e}")
+
+        if not schedule:
+            raise CommandError("Nothing to bill: give --amount and/or --schedule.")
+        if len(options['term']) > Fee._meta.get_field('term').max_length:
+            raise CommandError("--term is too long.")
+
+        run = generate_term_fees(schedule, options['term'], chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(run.summary()))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from school.ingest import ingest_attendance_log
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a gate terminal / CSV attendance log "
+        "(roll_number,date_or_timestamp[,status] per line)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file to import.")
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help="Lines written per bulk upsert (default 2000).")
+        parser.add_argument('--encoding', default='utf-8-sig')
+
+    def handle(self, *args, **options):
+        try:
+            log = open(options['path'], newline='', encoding=options['encoding'])
+        except OSError as e:
+            raise CommandError(f"Cannot open {options['path']}: {e}")
+
+        with log:
+            report = ingest_attendance_log(log, batch_size=options['batch_size'])
+
+        for line_no, line, reason in report.rejected:
+            self.stderr.write(f"line {line_no}: {reason}: {line}")
+        if report.rejected_count > len(report.rejected):
+            self.stderr.write(f"... {report.rejected_count - len(report.rejected)} more rejected lines")
+
+        self.stdout.write(self.style.SUCCESS(report.summary()))
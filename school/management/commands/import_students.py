@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from school.ingest import import_students
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-import students from a CSV file with the header "
+        "username,password,roll_number,classroom,gender,date_of_birth,address."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file to import.")
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help="Students written per transaction (default 500).")
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Password hashing processes (default: CPU count).")
+        parser.add_argument('--encoding', default='utf-8-sig')
+
+    def handle(self, *args, **options):
+        try:
+            source = open(options['path'], newline='', encoding=options['encoding'])
+        except OSError as e:
+            raise CommandError(f"Cannot open {options['path']}: {e}")
+
+        with source:
+            report = import_students(
+                source,
+                chunk_size=options['chunk_size'],
+                workers=options['workers']
+            )
+
+        for line_no, line, reason in report.rejected:
+            self.stderr.write(f"line {line_no}: {reason}: {line}")
+        if report.rejected_count > len(report.rejected):
+            self.stderr.write(f"... {report.rejected_count - len(report.rejected)} more rejected lines")
+
+        self.stdout.write(self.style.SUCCESS(report.summary()))
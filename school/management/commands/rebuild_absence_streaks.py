@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.timezone import now
+
+from school.absence import WINDOW_DAYS, update_absence_state
+from school.models import AbsenceStreak, Attendance
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the chronic-absence state from the last 30 days of attendance. "
+        "Only needed once for existing data; the state is kept up to date on every write."
+    )
+
+    def handle(self, *args, **options):
+        since = now().date() - timedelta(days=WINDOW_DAYS - 1)
+        entries = Attendance.objects.filter(date__gte=since).values_list(
+            'student_id', 'date', 'status'
+        )
+
+        with transaction.atomic():
+            AbsenceStreak.objects.all().delete()
+            update_absence_state(entries.iterator(chunk_size=2000), notify=False)
+
+        flagged = AbsenceStreak.objects.filter(flagged=True).count()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt absence state; {flagged} students are currently flagged."
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from school.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the monthly attendance rollups from the Attendance table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--student', type=int, action='append', dest='students',
+                            help="Only rebuild this student id (can be repeated).")
+
+    def handle(self, *args, **options):
+        written = rebuild_rollups(options['students'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} monthly rollup rows."))
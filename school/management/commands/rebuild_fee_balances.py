@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from school.fees import rebuild_fee_balances
+
+
+class Command(BaseCommand):
+    help = "Recompute the student and classroom fee balances from the Fee table."
+
+    def handle(self, *args, **options):
+        students = rebuild_fee_balances()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the fee balances of {students} students."))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+
+from school.models import Notification, UnreadNotificationCount
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-user unread notification counters from the Notification table."
+
+    def handle(self, *args, **options):
+        totals = (
+            Notification.objects
+            .filter(user__isnull=False)
+            .values('user_id')
+            .annotate(unread=Count('id', filter=Q(is_read=False)))
+        )
+
+        with transaction.atomic():
+            UnreadNotificationCount.objects.all().delete()
+            counters = UnreadNotificationCount.objects.bulk_create(
+                [
+                    UnreadNotificationCount(user_id=row['user_id'], count=row['unread'])
+                    for row in totals
+                ],
+                batch_size=1000
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt unread counters for {len(counters)} users."
+        ))
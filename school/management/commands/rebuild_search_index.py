@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from school.search import fts_available, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index of students and teachers."
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            self.stdout.write(self.style.WARNING(
+                "Full-text search is not available on this database; nothing to rebuild."
+            ))
+            return
+
+        with transaction.atomic():
+            rows = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {rows} students and teachers."))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from school.stats import ATTENDANCE_DAYS, reconcile_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the dashboard counters from the source tables and drop attendance "
+        "counters older than the window. Meant to run periodically (e.g. nightly from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=ATTENDANCE_DAYS,
+            help=f"Days of per-day attendance counters to keep (default {ATTENDANCE_DAYS})."
+        )
+
+    def handle(self, *args, **options):
+        drifted = reconcile_stats(days=options['days'])
+        for key, (stored, actual) in sorted(drifted.items()):
+            self.stdout.write(f"{key}: {stored} -> {actual}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Dashboard counters reconciled; {len(drifted)} had drifted."
+        ))
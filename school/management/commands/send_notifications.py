@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from school.fanout import deliver_pending
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver the queued notification fan-outs (notices, assignments sent to many users). "
+        "The web process normally does this in the background; run it from cron to pick up "
+        "deliveries interrupted by a restart, or when SCHOOL_FANOUT_BACKGROUND is off."
+    )
+
+    def handle(self, *args, **options):
+        written = deliver_pending()
+        self.stdout.write(self.style.SUCCESS(f"Delivered {written} notifications."))
@@ -0,0 +1,49 @@
+# Generated by Django 6.0 on 2026-10-18 07:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def seed_unread_counts(apps, schema_editor):
+    Notification = apps.get_model('school', 'Notification')
+    UnreadNotificationCount = apps.get_model('school', 'UnreadNotificationCount')
+    totals = (
+        Notification.objects
+        .filter(user__isnull=False)
+        .values('user_id')
+        .annotate(unread=Count('id', filter=Q(is_read=False)))
+    )
+    UnreadNotificationCount.objects.bulk_create(
+        [UnreadNotificationCount(user_id=row['user_id'], count=row['unread']) for row in totals],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('school', '0017_assignment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadNotificationCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'is_read'], name='notification_user_read_idx'),
+        ),
+        migrations.AddField(
+            model_name='unreadnotificationcount',
+            name='user',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='unread_notification_count', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(seed_unread_counts, migrations.RunPython.noop),
+    ]
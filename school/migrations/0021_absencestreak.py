@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-18 07:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('school', '0020_attendancebitmap'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AbsenceStreak',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window_end', models.DateField(blank=True, null=True)),
+                ('recorded_mask', models.BigIntegerField(default=0)),
+                ('absent_mask', models.BigIntegerField(default=0)),
+                ('streak', models.PositiveIntegerField(default=0)),
+                ('flagged', models.BooleanField(default=False)),
+                ('flagged_on', models.DateField(blank=True, null=True)),
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='absence_streak', to='school.student')),
+            ],
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 6.0 on 2026-10-18 09:12
+
+from django.db import migrations
+from django.db.utils import OperationalError
+
+FTS_TABLE = 'school_directory_fts'
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite-only and optional: other databases keep the icontains search
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "username, full_name, email, roll_number, classroom, prefix='2 3')"
+        )
+    except OperationalError:
+        # SQLite built without FTS5
+        return
+
+    schema_editor.execute(f"""
+        INSERT INTO {FTS_TABLE} (rowid, username, full_name, email, roll_number, classroom)
+        SELECT s.id * 2, u.username, TRIM(u.first_name || ' ' || u.last_name), u.email,
+               CAST(s.roll_number AS TEXT), COALESCE(c.class_name || ' ' || c.section, '')
+        FROM school_student s
+        JOIN auth_user u ON u.id = s.user_id
+        LEFT JOIN school_classroom c ON c.id = s.classroom_id
+    """)
+    schema_editor.execute(f"""
+        INSERT INTO {FTS_TABLE} (rowid, username, full_name, email, roll_number, classroom)
+        SELECT t.id * 2 + 1, u.username, t.full_name, t.email, '', ''
+        FROM school_teacher t
+        JOIN auth_user u ON u.id = t.user_id
+    """)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('school', '0021_absencestreak'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 6.0 on 2026-10-18 07:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('school', '0022_directory_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='notice',
+            options={'ordering': ['-created_at']},
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['classroom', 'due_date', 'id'], name='assignment_class_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['due_date', 'id'], name='assignment_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notice',
+            index=models.Index(fields=['created_at', 'id'], name='notice_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='notification_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['classroom', 'roll_number'], name='student_class_roll_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['date_of_birth', 'id'], name='student_dob_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teacher',
+            index=models.Index(fields=['full_name', 'id'], name='teacher_name_idx'),
+        ),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 6.0 on 2026-10-18 07:36
+
+import datetime
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Sum
+from django.db.models.functions import Greatest
+
+
+def build_ledger(apps, schema_editor):
+    Fee = apps.get_model('school', 'Fee')
+    FeePayment = apps.get_model('school', 'FeePayment')
+    FeeBalance = apps.get_model('school', 'FeeBalance')
+    ClassFeeBalance = apps.get_model('school', 'ClassFeeBalance')
+
+    # What was paid so far becomes one payment per installment
+    FeePayment.objects.bulk_create(
+        [
+            FeePayment(fee_id=pk, amount=paid, paid_on=payment_date or created_at,
+                       remarks='Paid before the fee ledger')
+            for pk, paid, payment_date, created_at in Fee.objects.filter(paid_amount__gt=0)
+            .values_list('pk', 'paid_amount', 'payment_date', 'created_at')
+        ],
+        batch_size=500
+    )
+
+    per_student = (
+        Fee.objects
+        .values('student_id', 'student__classroom_id')
+        .annotate(
+            billed=Sum('amount'),
+            paid=Sum('paid_amount'),
+            due=Sum(Greatest(F('amount') - F('paid_amount'), 0)),
+        )
+        .order_by()
+    )
+    balances = []
+    classes = {}
+    for row in per_student:
+        classroom_id = row['student__classroom_id']
+        balances.append(FeeBalance(
+            student_id=row['student_id'], classroom_id=classroom_id,
+            billed=row['billed'], paid=row['paid'], due=row['due']
+        ))
+        if classroom_id is not None:
+            totals = classes.setdefault(classroom_id, ClassFeeBalance(classroom_id=classroom_id))
+            totals.billed += row['billed']
+            totals.paid += row['paid']
+            totals.due += row['due']
+    FeeBalance.objects.bulk_create(balances, batch_size=500)
+    ClassFeeBalance.objects.bulk_create(classes.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('school', '0024_dashboardstat'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassFeeBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('billed', models.BigIntegerField(default=0)),
+                ('paid', models.BigIntegerField(default=0)),
+                ('due', models.BigIntegerField(default=0)),
+                ('classroom', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='fee_balance', to='school.classroom')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FeePayment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.PositiveIntegerField()),
+                ('paid_on', models.DateField(default=datetime.date.today)),
+                ('remarks', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('fee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payments', to='school.fee')),
+                ('recorded_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-paid_on', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='FeeBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('billed', models.BigIntegerField(default=0)),
+                ('paid', models.BigIntegerField(default=0)),
+                ('due', models.BigIntegerField(default=0)),
+                ('classroom', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='school.classroom')),
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='fee_balance', to='school.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['classroom', 'due'], name='fee_balance_class_due_idx'), models.Index(fields=['due'], name='fee_balance_due_idx')],
+            },
+        ),
+        migrations.RunPython(build_ledger, migrations.RunPython.noop),
+    ]
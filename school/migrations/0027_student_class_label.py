@@ -0,0 +1,32 @@
+# Generated by Django 6.0 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+def fill_class_labels(apps, schema_editor):
+    ClassRoom = apps.get_model('school', 'ClassRoom')
+    Student = apps.get_model('school', 'Student')
+    for classroom in ClassRoom.objects.all():
+        Student.objects.filter(classroom=classroom).update(
+            class_label=f"{classroom.class_name} - {classroom.section}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('school', '0026_notificationfanout'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='class_label',
+            field=models.CharField(blank=True, default='', editable=False, max_length=63),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['class_label', 'roll_number'], name='student_label_roll_idx'),
+        ),
+        migrations.RunPython(fill_class_labels, migrations.RunPython.noop),
+    ]
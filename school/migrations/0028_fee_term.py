@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-18 09:30
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Length
+
+
+def fill_terms(apps, schema_editor):
+    # generate_term_fees stored the term in remarks and billed it once per
+    # student; remarks a student has more than once were typed by hand
+    Fee = apps.get_model('school', 'Fee')
+    once = (
+        Fee.objects.exclude(remarks='')
+        .annotate(length=Length('remarks')).filter(length__lte=50)
+        .values('student_id', 'remarks')
+        .annotate(fees=Count('id')).filter(fees=1)
+    )
+    for row in once.iterator():
+        Fee.objects.filter(student_id=row['student_id'], remarks=row['remarks']).update(term=row['remarks'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('school', '0027_student_class_label'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fee',
+            name='term',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.RunPython(fill_terms, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='fee',
+            constraint=models.UniqueConstraint(condition=models.Q(('term', ''), _negated=True), fields=('student', 'term'), name='fee_student_term_uniq'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from decimal import Decimal
+from datetime import date
 from django.contrib.auth.models import User
 # =========================
 # Teacher Model
@@ -15,7 +16,12 @@ class Teacher(models.Model):
         upload_to='teacher_profiles/', 
         default='teacher_profiles.default.png',
         blank=True, null=True)
-    
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['full_name', 'id'], name='teacher_name_idx'),
+        ]
+
     def __str__(self):
         return self.full_name
 class ClassRoom(models.Model):
@@ -71,6 +77,16 @@ class Student(models.Model):
     )
     date_of_birth = models.DateField()
     address = models.TextField()
+    # str(classroom), kept in step by signals.py so the list can sort by class
+    class_label = models.CharField(max_length=63, blank=True, default='', editable=False)
+
+    class Meta:
+        # Sort keys of the student list (roll_number is already unique)
+        indexes = [
+            models.Index(fields=['classroom', 'roll_number'], name='student_class_roll_idx'),
+            models.Index(fields=['class_label', 'roll_number'], name='student_label_roll_idx'),
+            models.Index(fields=['date_of_birth', 'id'], name='student_dob_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.roll_number}"
@@ -97,6 +113,96 @@ class Attendance(models.Model):
     def __str__(self):
         return f"{self.student.user.username} - {self.date} - {self.status}"
 
+class AttendanceBitmap(models.Model):
+    """
+    Attendance of one classroom for one day in compact form
+    (see school/bitmaps.py). Closed terms are moved here from Attendance
+    by ``manage.py compact_attendance``.
+    """
+    # Kept (as NULL) if the classroom is deleted: the history belongs to the students
+    classroom = models.ForeignKey(
+        ClassRoom,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="attendance_bitmaps"
+    )
+    date = models.DateField()
+    students = models.BinaryField()
+    present = models.BinaryField()
+    total = models.PositiveIntegerField(default=0)
+    present_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('classroom', 'date')
+        ordering = ['-date']
+        indexes = [
+            models.Index(fields=['date'], name='attendance_bitmap_date_idx'),
+        ]
+
+    @property
+    def absent_count(self):
+        return self.total - self.present_count
+
+    def __str__(self):
+        return f"{self.classroom} - {self.date}"
+
+class AttendanceRollup(models.Model):
+    """
+    Present/absent counts of one student for one month.
+    Maintained incrementally from Attendance writes (see school/rollups.py)
+    so percentages are read from a handful of rows instead of every day.
+    """
+    student = models.ForeignKey(
+        Student,
+        on_delete=models.CASCADE,
+        related_name="attendance_rollups"
+    )
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    present = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('student', 'year', 'month')
+        ordering = ['-year', '-month']
+        indexes = [
+            models.Index(fields=['year', 'month'], name='rollup_year_month_idx'),
+        ]
+
+    @property
+    def total(self):
+        return self.present + self.absent
+
+    @property
+    def percentage(self):
+        return round(self.present * 100 / self.total, 2) if self.total else None
+
+    def __str__(self):
+        return f"{self.student.user.username} - {self.year}/{self.month:02d}"
+
+class AbsenceStreak(models.Model):
+    """
+    Small per-student state for chronic-absence detection.
+
+    ``recorded_mask`` / ``absent_mask`` hold one bit per calendar day of the
+    last 30 days, bit 0 being ``window_end``. Updated on every Attendance
+    write (see school/absence.py) so no job has to rescan attendance.
+    """
+    student = models.OneToOneField(
+        Student,
+        on_delete=models.CASCADE,
+        related_name="absence_streak"
+    )
+    window_end = models.DateField(null=True, blank=True)
+    recorded_mask = models.BigIntegerField(default=0)
+    absent_mask = models.BigIntegerField(default=0)
+    streak = models.PositiveIntegerField(default=0)
+    flagged = models.BooleanField(default=False)
+    flagged_on = models.DateField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.student.user.username} - streak {self.streak}"
+
 class Notice(models.Model):
     title = models.CharField(max_length=200)
     message = models.TextField()
@@ -106,8 +212,11 @@ class Notice(models.Model):
         related_name="notices"
     )
     created_at = models.DateTimeField(auto_now_add=True)
-    class meta:
+    class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='notice_created_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -129,8 +238,75 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'is_read'], name='notification_user_read_idx'),
+            models.Index(fields=['user', 'created_at', 'id'], name='notification_user_created_idx'),
+        ]
+
     def __str__(self):
         return self.title
+
+
+class UnreadNotificationCount(models.Model):
+    """
+    Denormalized number of unread notifications per user.
+    Kept in step by create_notification / mark read / delete so the
+    navbar badge is a single-row lookup instead of a COUNT(*).
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='unread_notification_count'
+    )
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.count} unread"
+
+
+class NotificationFanout(models.Model):
+    """
+    One notification sent to an audience (users, groups, classrooms or
+    the whole school), queued for the background worker (school/fanout.py).
+    ``last_user_id`` is the last recipient written, so an interrupted
+    delivery resumes after it; ``sent_at`` is set once everyone has it.
+    """
+    title = models.CharField(max_length=50)
+    message = models.TextField()
+    audience = models.JSONField(default=dict)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_user_id = models.BigIntegerField(default=0)
+    recipients = models.PositiveIntegerField(default=0)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['sent_at', 'id'], name='fanout_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.title} ({'sent' if self.sent_at else 'pending'})"
+
+
+class DashboardStat(models.Model):
+    """
+    Named counter shown on the dashboard (``students``, ``outstanding_fees``,
+    ``attendance_present:2026-10-18``, ...). Kept in step by signals, see
+    school/stats.py, so the dashboard reads one indexed query.
+    """
+    key = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key} = {self.value}"
     
 
 class Result(models.Model):
@@ -194,18 +370,104 @@ class Fee(models.Model):
     )
     payment_date = models.DateField(null=True, blank=True)
     remarks = models.TextField(blank=True)
+    # Billing term of installments from fees.generate_term_fees, blank otherwise
+    term = models.CharField(max_length=50, blank=True, default='')
     created_at = models.DateField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student', 'term'], condition=~models.Q(term=''), name='fee_student_term_uniq'
+            ),
+        ]
+
+    @staticmethod
+    def status_for(amount, paid_amount):
+        return 'paid' if paid_amount >= amount else 'panding'
+
     def save(self, *args, **kwargs):
-        if self.paid_amount >= self.amount:
-            self.status = 'paid'
-        else:
-            self.status = 'panding'
+        self.status = self.status_for(self.amount, self.paid_amount)
         super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.student.user.username}-{self.status}"
 
+
+class FeePayment(models.Model):
+    """
+    One payment towards a Fee installment. ``Fee.paid_amount`` is the sum
+    of its payments; record them with school.fees.record_payment.
+    """
+    fee = models.ForeignKey(
+        Fee,
+        on_delete=models.CASCADE,
+        related_name="payments"
+    )
+    amount = models.PositiveIntegerField()
+    paid_on = models.DateField(default=date.today)
+    remarks = models.TextField(blank=True)
+    recorded_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-paid_on', '-id']
+
+    def __str__(self):
+        return f"{self.fee} - {self.amount}"
+
+
+class FeeBalance(models.Model):
+    """
+    Running fee balance of one student: ``billed`` (sum of Fee.amount),
+    ``paid`` and ``due`` (sum of the unpaid part of each installment).
+    Moved by every Fee write (see school/fees.py); ``classroom`` is the
+    student's, copied so the dues report is one indexed query.
+    """
+    student = models.OneToOneField(
+        Student,
+        on_delete=models.CASCADE,
+        related_name="fee_balance"
+    )
+    classroom = models.ForeignKey(
+        ClassRoom,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+"
+    )
+    billed = models.BigIntegerField(default=0)
+    paid = models.BigIntegerField(default=0)
+    due = models.BigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['classroom', 'due'], name='fee_balance_class_due_idx'),
+            models.Index(fields=['due'], name='fee_balance_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student.user.username} - {self.due} due"
+
+
+class ClassFeeBalance(models.Model):
+    """Running fee balance of one classroom (sum of its students' FeeBalance)."""
+    classroom = models.OneToOneField(
+        ClassRoom,
+        on_delete=models.CASCADE,
+        related_name="fee_balance"
+    )
+    billed = models.BigIntegerField(default=0)
+    paid = models.BigIntegerField(default=0)
+    due = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.classroom} - {self.due} due"
+
 # school/models.py
 
 class Assignment(models.Model):
@@ -233,5 +495,11 @@ class Assignment(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['classroom', 'due_date', 'id'], name='assignment_class_due_idx'),
+            models.Index(fields=['due_date', 'id'], name='assignment_due_idx'),
+        ]
+
     def __str__(self):
         return f"{self.title} - {self.classroom}"
\ No newline at end of file
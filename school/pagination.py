@@ -0,0 +1,198 @@
+"""
+Keyset (cursor) pagination for list pages.
+
+A page is fetched with ``WHERE (sort keys) > (keys of the last row seen)
+ORDER BY sort keys LIMIT n + 1`` instead of ``OFFSET``/``COUNT(*)``, so
+every page costs one indexed range scan however deep it is. The keys of
+the first/last row travel in the ``after`` / ``before`` query parameters.
+
+The ordering passed in must end in a unique field (``roll_number``,
+``id``, ...) so that every row has a distinct position. NULLs sort as the
+smallest value in both directions.
+"""
+import base64
+import json
+from datetime import date, datetime
+
+from django.conf import settings
+from django.db.models import F, Q
+
+PAGE_SIZE = getattr(settings, 'SCHOOL_PAGE_SIZE', 25)
+
+
+class Page:
+    """One page of rows plus the query strings of its neighbours."""
+
+    def __init__(self, items, params, next_cursor=None, previous_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self._params = params
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def _query(self, name, cursor):
+        params = self._params.copy()
+        params.pop('after', None)
+        params.pop('before', None)
+        params[name] = cursor
+        return params.urlencode()
+
+    @property
+    def next_query(self):
+        return self._query('after', self.next_cursor) if self.has_next else ''
+
+    @property
+    def previous_query(self):
+        return self._query('before', self.previous_cursor) if self.has_previous else ''
+
+
+def _parse_ordering(ordering):
+    return [(field.lstrip('-'), field.startswith('-')) for field in ordering]
+
+
+def _key_value(obj, field):
+    """Value of a sort key on a fetched row (foreign keys give their id)."""
+    *path, last = field.split('__')
+    for part in path:
+        obj = getattr(obj, part, None)
+        if obj is None:
+            return None
+    model_field = obj._meta.get_field(last) if last != 'pk' else obj._meta.pk
+    return getattr(obj, model_field.attname)
+
+
+def encode_cursor(values):
+    raw = json.dumps([
+        value.isoformat() if isinstance(value, (date, datetime)) else value
+        for value in values
+    ])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """Cursor values, or None when the cursor is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    return values
+
+
+def _order_by(keys):
+    return [
+        F(field).desc(nulls_last=True) if descending else F(field).asc(nulls_first=True)
+        for field, descending in keys
+    ]
+
+
+def _nullable(model, field):
+    if '__' in field:
+        return True
+    model_field = model._meta.pk if field == 'pk' else model._meta.get_field(field)
+    return model_field.null
+
+
+def _after(model, keys, values):
+    """Q for the rows that come strictly after ``values`` in ``keys`` order."""
+    condition = Q(pk__in=[])
+    equal = Q()
+    for (field, descending), value in zip(keys, values):
+        if value is None:
+            beyond = Q(pk__in=[]) if descending else Q(**{f'{field}__isnull': False})
+            same = Q(**{f'{field}__isnull': True})
+        else:
+            beyond = Q(**{f'{field}__lt' if descending else f'{field}__gt': value})
+            if descending:
+                beyond |= Q(**{f'{field}__isnull': True})
+            same = Q(**{field: value})
+        condition |= equal & beyond
+        equal &= same
+
+    # The OR chain alone makes the planner walk the index from the start;
+    # a plain bound on the first key lets it seek straight to the cursor
+    field, descending = keys[0]
+    value = values[0]
+    if value is not None:
+        seek = Q(**{f'{field}__lte' if descending else f'{field}__gte': value})
+        if descending and _nullable(model, field):
+            seek |= Q(**{f'{field}__isnull': True})
+        condition &= seek
+    elif descending:
+        condition &= Q(**{f'{field}__isnull': True})
+    return condition
+
+
+def paginate(request, queryset, ordering, per_page=PAGE_SIZE):
+    """
+    Return the Page of ``queryset`` selected by the request's ``after`` /
+    ``before`` cursor, sorted by ``ordering`` (e.g. ``('-created_at', 'id')``
+    or ``('classroom', 'roll_number')``).
+    """
+    keys = _parse_ordering(ordering)
+    params = request.GET.copy()
+
+    backwards = False
+    values = None
+    if params.get('before'):
+        values = decode_cursor(params['before'], len(keys))
+        backwards = values is not None
+    if values is None and params.get('after'):
+        values = decode_cursor(params['after'], len(keys))
+
+    walk = [(field, not descending) for field, descending in keys] if backwards else keys
+    rows = queryset.order_by(*_order_by(walk))
+    if values is not None:
+        rows = rows.filter(_after(queryset.model, walk, values))
+
+    items = list(rows[:per_page + 1])
+    more = len(items) > per_page
+    items = items[:per_page]
+    if backwards:
+        items.reverse()
+
+    def cursor(obj):
+        return encode_cursor([_key_value(obj, field) for field, _ in keys])
+
+    next_cursor = previous_cursor = None
+    if items:
+        # Arriving through a cursor means there are rows on the side we came from
+        if more or backwards:
+            next_cursor = cursor(items[-1])
+        if (more and backwards) or (values is not None and not backwards):
+            previous_cursor = cursor(items[0])
+
+    return Page(items, params, next_cursor, previous_cursor)
+
+
+def resolve_sort(value, sorts, default):
+    """
+    Map a ``sort`` query value (``'dob'``, ``'-dob'``, ...) to an ordering
+    from ``sorts``; unknown values fall back to ``default``. Returns
+    ``(sort value, ordering)``.
+    """
+    name = (value or '').lstrip('-')
+    if name not in sorts:
+        value, name = default, default.lstrip('-')
+    ordering = sorts[name]
+    if value.startswith('-'):
+        ordering = tuple(
+            field[1:] if field.startswith('-') else f'-{field}'
+            for field in ordering
+        )
+    return value, ordering
@@ -0,0 +1,27 @@
+"""
+Report-card rendering for process pools.
+
+Kept free of model imports like hashing.py: spawned workers import this
+module before Django is set up (``hashing.init_worker`` sets it up). Each
+job carries a plain dict context prepared by reportcards.py.
+"""
+import os
+
+REPORT_CARD_TEMPLATE = 'school/report_card.html'
+
+
+def write_atomic(path, content):
+    """Write ``content`` so that ``path`` either does not exist or is complete."""
+    temporary = f"{path}.part"
+    with open(temporary, 'w', encoding='utf-8') as handle:
+        handle.write(content)
+    os.replace(temporary, path)
+
+
+def render_cards(jobs):
+    """Render ``(path, context)`` jobs to self-contained HTML files; returns the count."""
+    from django.template.loader import render_to_string
+
+    for path, context in jobs:
+        write_atomic(path, render_to_string(REPORT_CARD_TEMPLATE, context))
+    return len(jobs)
@@ -0,0 +1,209 @@
+"""
+Batch report cards.
+
+Each card combines the student's Result, class rank, attendance percentage
+(from the monthly rollups) and fee status. All inputs are read up front in
+a handful of queries into plain dicts; rendering is spread over a process
+pool (rendering.render_cards) and every card is written atomically to::
+
+    MEDIA_ROOT/report_cards/<batch>/<class>/<roll>.html
+
+A rerun skips the cards that already exist, so an interrupted run resumes
+where it stopped. Each classroom's cards are then zipped into
+``<batch>/<class>.zip``.
+"""
+import multiprocessing
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+from django.conf import settings
+from django.db.models import Sum
+from django.utils.text import slugify
+
+from .analytics import SUBJECTS
+from .hashing import init_worker
+from .leaderboard import class_leaderboard, percentile
+from .models import AttendanceRollup, Fee, Result, Student
+from .rendering import render_cards
+
+OUTPUT_DIR = 'report_cards'
+
+# Cards handed to a worker at a time
+JOB_SIZE = 50
+
+
+class ReportCardRun:
+    """Counters of one generation run."""
+
+    def __init__(self, batch):
+        self.batch = batch
+        self.students = 0
+        self.rendered = 0
+        self.skipped = 0
+        self.archives = []
+        self.elapsed = 0.0
+
+    @property
+    def cards_per_second(self):
+        return self.rendered / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        return (
+            f"{self.students} students: {self.rendered} cards rendered, "
+            f"{self.skipped} already done, {len(self.archives)} classroom zips "
+            f"in {self.elapsed:.2f}s ({self.cards_per_second:,.1f} cards/s)"
+        )
+
+
+def batch_root(batch):
+    return os.path.join(settings.MEDIA_ROOT, OUTPUT_DIR, slugify(batch) or 'batch')
+
+
+def _folder(classroom):
+    if classroom is None:
+        return 'unassigned'
+    return f"{slugify(str(classroom)) or 'class'}-{classroom.pk}"
+
+
+def _attendance_percentage(present, absent):
+    total = (present or 0) + (absent or 0)
+    return round((present or 0) * 100 / total, 2) if total else None
+
+
+def collect_cards(classroom_ids=None, title=''):
+    """
+    Yield ``(classroom, student, context)`` for every student (of the given
+    classrooms), ordered by class and roll number. Reads everything in five
+    queries plus one per classroom whose leaderboard is not cached.
+    """
+    scope = Student.objects.all()
+    if classroom_ids is not None:
+        scope = scope.filter(classroom_id__in=classroom_ids)
+
+    results = {
+        row['student_id']: row
+        for row in Result.objects.filter(student__in=scope).values(
+            'student_id', *[field for field, _ in SUBJECTS], 'total', 'per', 'grade'
+        )
+    }
+    attendance = {
+        row['student_id']: _attendance_percentage(row['present'], row['absent'])
+        for row in AttendanceRollup.objects.filter(student__in=scope)
+        .values('student_id')
+        .annotate(present=Sum('present'), absent=Sum('absent'))
+        .order_by()
+    }
+    fees = {
+        row['student_id']: row
+        for row in Fee.objects.filter(student__in=scope)
+        .values('student_id')
+        .annotate(amount=Sum('amount'), paid=Sum('paid_amount'))
+        .order_by()
+    }
+
+    students = scope.select_related('user', 'classroom').order_by('classroom_id', 'roll_number')
+    boards = {}
+    generated = date.today()
+    for student in students.iterator(chunk_size=2000):
+        classroom = student.classroom
+        board = {}
+        if classroom is not None:
+            if classroom.pk not in boards:
+                boards[classroom.pk] = class_leaderboard(classroom.pk)
+            board = boards[classroom.pk]
+
+        result = results.get(student.id)
+        rank = board.get(student.id)
+        fee = fees.get(student.id)
+        context = {
+            'title': title,
+            'generated': generated,
+            'username': student.user.username,
+            'full_name': student.user.get_full_name(),
+            'roll_number': student.roll_number,
+            'classroom': str(classroom) if classroom else '',
+            'result': result and {
+                'subjects': [(name, result[field]) for field, name in SUBJECTS],
+                'total': result['total'],
+                'per': result['per'],
+                'grade': result['grade'],
+            },
+            'rank': rank and rank[0],
+            'class_size': len(board),
+            'percentile': percentile(rank[1]) if rank else None,
+            'attendance': attendance.get(student.id),
+            'fee': fee and {
+                'amount': fee['amount'],
+                'paid': fee['paid'],
+                'due': max(fee['amount'] - fee['paid'], 0),
+            },
+        }
+        yield classroom, student, context
+
+
+def _archive(folder, files):
+    """Zip a classroom's cards next to its folder (rewritten on every run)."""
+    path = f"{folder}.zip"
+    temporary = f"{path}.part"
+    with zipfile.ZipFile(temporary, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name in sorted(files):
+            archive.write(os.path.join(folder, name), name)
+    os.replace(temporary, path)
+    return path
+
+
+def generate_report_cards(classroom_ids=None, batch=None, title='', workers=None,
+                          force=False, progress=None):
+    """
+    Render the report cards of every student (of the given classrooms)
+    into ``MEDIA_ROOT/report_cards/<batch>/`` and zip each classroom.
+    ``force`` re-renders cards that already exist; ``progress(run, pending)``
+    is called after every chunk of cards. Returns a ReportCardRun.
+    """
+    batch = batch or date.today().isoformat()
+    run = ReportCardRun(batch)
+    started = time.perf_counter()
+    root = batch_root(batch)
+
+    jobs = []
+    folders = {}
+    for classroom, student, context in collect_cards(classroom_ids, title or batch):
+        run.students += 1
+        folder = os.path.join(root, _folder(classroom))
+        if folder not in folders:
+            os.makedirs(folder, exist_ok=True)
+            folders[folder] = []
+        name = f"{student.roll_number}.html"
+        folders[folder].append(name)
+
+        path = os.path.join(folder, name)
+        if not force and os.path.exists(path):
+            run.skipped += 1
+            continue
+        jobs.append((path, context))
+
+    workers = workers or os.cpu_count() or 1
+    chunks = [jobs[start:start + JOB_SIZE] for start in range(0, len(jobs), JOB_SIZE)]
+    if workers == 1 or len(chunks) <= 1:
+        # Not worth starting a pool
+        for chunk in chunks:
+            run.rendered += render_cards(chunk)
+            if progress:
+                progress(run, len(jobs))
+    elif chunks:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=init_worker) as pool:
+            for rendered in pool.map(render_cards, chunks):
+                run.rendered += rendered
+                if progress:
+                    progress(run, len(jobs))
+
+    for folder, files in folders.items():
+        run.archives.append(_archive(folder, files))
+
+    run.elapsed = time.perf_counter() - started
+    return run
@@ -0,0 +1,93 @@
+"""
+Bulk result entry.
+
+A whole classroom's marks arrive as one grid; totals, percentages and
+grades for every row are computed in one NumPy pass (same thresholds as
+Result.save, via analytics.grade_for) and the rows are written with one
+``bulk_create`` and one ``bulk_update`` inside a transaction.
+"""
+import numpy as np
+from django.db import transaction
+
+from .analytics import MAX_MARKS, SUBJECT_FIELDS, grade_for, invalidate_result_stats
+from .leaderboard import invalidate_leaderboards
+from .models import Result, Student
+
+BATCH_SIZE = 500
+
+
+def results_by_student(student_ids):
+    """Map student id -> Result for the given students (one query)."""
+    return {
+        result.student_id: result
+        for result in Result.objects.filter(student_id__in=list(student_ids))
+    }
+
+
+def bulk_save_results(marks, classroom_id=None):
+    """
+    Create or update the Result of many students at once.
+
+    ``marks`` maps student id -> sequence of the seven subject marks;
+    ``classroom_id`` saves looking up the students' classes when they are
+    all in one. Rows whose marks did not change are skipped. Returns
+    ``(created, updated)`` counts.
+    """
+    if not marks:
+        return 0, 0
+
+    student_ids = list(marks)
+    block = np.array([marks[student_id] for student_id in student_ids], dtype=np.int64)
+    totals = block.sum(axis=1)
+    percentages = totals * 100 / (MAX_MARKS * len(SUBJECT_FIELDS))
+    grades = grade_for(percentages)
+
+    # Round the percentage exactly as saving the field one row at a time would
+    per_field = Result._meta.get_field('per')
+
+    with transaction.atomic():
+        existing = results_by_student(student_ids)
+        to_create = []
+        to_update = []
+        for index, student_id in enumerate(student_ids):
+            values = dict(zip(SUBJECT_FIELDS, (int(mark) for mark in block[index])))
+            values['total'] = int(totals[index])
+            values['per'] = per_field.to_python(float(percentages[index]))
+            values['grade'] = str(grades[index])
+
+            result = existing.get(student_id)
+            if result is None:
+                to_create.append(Result(student_id=student_id, **values))
+            elif any(getattr(result, field) != values[field] for field in SUBJECT_FIELDS):
+                for field, value in values.items():
+                    setattr(result, field, value)
+                to_update.append(result)
+
+        if to_create:
+            Result.objects.bulk_create(
+                to_create,
+                batch_size=BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=['student'],
+                update_fields=[*SUBJECT_FIELDS, 'total', 'per', 'grade']
+            )
+        if to_update:
+            Result.objects.bulk_update(
+                to_update,
+                [*SUBJECT_FIELDS, 'total', 'per', 'grade'],
+                batch_size=BATCH_SIZE
+            )
+
+        # Bulk writes do not send post_save
+        if to_create or to_update:
+            if classroom_id is not None:
+                classroom_ids = [classroom_id]
+            else:
+                classroom_ids = Student.objects.filter(id__in=student_ids).values_list(
+                    'classroom_id', flat=True
+                ).distinct()
+            classroom_ids = list(classroom_ids)
+            invalidate_result_stats(*classroom_ids)
+            invalidate_leaderboards(*classroom_ids)
+
+    return len(to_create), len(to_update)
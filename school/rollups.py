@@ -0,0 +1,187 @@
+"""
+Monthly attendance rollups.
+
+Every Attendance write is turned into +1/-1 deltas on the
+(student, year, month) row of AttendanceRollup, so attendance percentages
+per month or per term read O(months) rows instead of O(days).
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear, Greatest
+
+from .bitmaps import decode_statuses
+from .models import Attendance, AttendanceBitmap, AttendanceRollup, Student
+
+BATCH_SIZE = 500
+
+
+def attendance_deltas(changes):
+    """
+    Turn AttendanceChange tuples (see school.attendance) into
+    ``(student_id, date, status, +1/-1)`` deltas.
+    """
+    for change in changes:
+        if change.old_status:
+            yield change.student_id, change.date, change.old_status, -1
+        if change.new_status:
+            yield change.student_id, change.date, change.new_status, 1
+
+
+def apply_attendance_deltas(deltas):
+    """
+    Apply ``(student_id, date, status, sign)`` deltas to the rollup table.
+
+    Missing rollup rows are created first, then counters are moved with
+    ``UPDATE ... SET present = present + n`` (never below zero) so
+    concurrent writers do not overwrite each other. Keys that share the
+    same delta are updated with a single statement, which keeps a
+    whole-class bulk write to a few queries.
+    """
+    totals = defaultdict(lambda: [0, 0])
+    for student_id, day, status, sign in deltas:
+        counts = totals[(student_id, day.year, day.month)]
+        counts[0 if status == 'Present' else 1] += sign
+
+    # (year, month, present delta, absent delta) -> student ids
+    groups = defaultdict(list)
+    for (student_id, year, month), (present, absent) in totals.items():
+        if present or absent:
+            groups[(year, month, present, absent)].append(student_id)
+
+    if not groups:
+        return
+
+    with transaction.atomic():
+        # Pure decrements never need a new row (e.g. the rollup was already
+        # removed together with the student)
+        months = defaultdict(set)
+        for (student_id, year, month), (present, absent) in totals.items():
+            if present > 0 or absent > 0:
+                months[(year, month)].add(student_id)
+
+        for (year, month), student_ids in months.items():
+            student_ids = sorted(student_ids)
+            for start in range(0, len(student_ids), BATCH_SIZE):
+                chunk = student_ids[start:start + BATCH_SIZE]
+                existing = set(
+                    AttendanceRollup.objects.filter(
+                        year=year, month=month, student_id__in=chunk
+                    ).values_list('student_id', flat=True)
+                )
+                AttendanceRollup.objects.bulk_create(
+                    [
+                        AttendanceRollup(student_id=student_id, year=year, month=month)
+                        for student_id in chunk
+                        if student_id not in existing
+                    ],
+                    ignore_conflicts=True
+                )
+
+        for (year, month, present, absent), student_ids in groups.items():
+            for start in range(0, len(student_ids), BATCH_SIZE):
+                AttendanceRollup.objects.filter(
+                    year=year,
+                    month=month,
+                    student_id__in=student_ids[start:start + BATCH_SIZE]
+                ).update(
+                    present=Greatest(F('present') + present, 0),
+                    absent=Greatest(F('absent') + absent, 0)
+                )
+
+
+def rebuild_rollups(student_ids=None):
+    """
+    Recompute rollups from the Attendance table and the compacted bitmaps,
+    for everyone or for the given students. Returns the number of rollup
+    rows written.
+    """
+    rows = Attendance.objects.all()
+    old = AttendanceRollup.objects.all()
+    if student_ids is not None:
+        student_ids = set(student_ids)
+        rows = rows.filter(student_id__in=student_ids)
+        old = old.filter(student_id__in=student_ids)
+
+    monthly = (
+        rows
+        .annotate(year=ExtractYear('date'), month=ExtractMonth('date'))
+        .values('student_id', 'year', 'month')
+        .annotate(
+            present=Count('id', filter=Q(status='Present')),
+            absent=Count('id', filter=Q(status='Absent'))
+        )
+        .order_by()
+    )
+    totals = defaultdict(lambda: [0, 0])
+    for row in monthly.iterator(chunk_size=2000):
+        totals[(row['student_id'], row['year'], row['month'])] = [row['present'], row['absent']]
+
+    # Bitmaps may still list students that were deleted since
+    wanted = set(Student.objects.values_list('id', flat=True))
+    if student_ids is not None:
+        wanted &= student_ids
+
+    bitmaps = AttendanceBitmap.objects.only('date', 'students', 'present')
+    for bitmap in bitmaps.iterator(chunk_size=500):
+        for student_id, status in decode_statuses(bitmap.students, bitmap.present).items():
+            if student_id in wanted:
+                counts = totals[(student_id, bitmap.date.year, bitmap.date.month)]
+                counts[0 if status == 'Present' else 1] += 1
+
+    with transaction.atomic():
+        old.delete()
+        created = AttendanceRollup.objects.bulk_create(
+            [
+                AttendanceRollup(
+                    student_id=student_id, year=year, month=month,
+                    present=present, absent=absent
+                )
+                for (student_id, year, month), (present, absent) in totals.items()
+            ],
+            batch_size=BATCH_SIZE
+        )
+    return len(created)
+
+
+# =========================
+# Query helpers
+# =========================
+def _month_range(start=None, end=None):
+    """Q filter for rollups between two (year, month) pairs, both inclusive."""
+    condition = Q()
+    if start:
+        year, month = start
+        condition &= Q(year__gt=year) | Q(year=year, month__gte=month)
+    if end:
+        year, month = end
+        condition &= Q(year__lt=year) | Q(year=year, month__lte=month)
+    return condition
+
+
+def _percentage(present, absent):
+    total = (present or 0) + (absent or 0)
+    return round((present or 0) * 100 / total, 2) if total else None
+
+
+def monthly_attendance(student_id, start=None, end=None):
+    """Rollup rows of one student, newest month first."""
+    return AttendanceRollup.objects.filter(
+        _month_range(start, end),
+        student_id=student_id
+    )
+
+
+def attendance_percentage(student_id, start=None, end=None):
+    """
+    Attendance percentage of one student between two (year, month) pairs,
+    e.g. a term: ``attendance_percentage(s.id, (2026, 6), (2026, 10))``.
+    Returns None when nothing was recorded.
+    """
+    totals = monthly_attendance(student_id, start, end).aggregate(
+        present=Sum('present'),
+        absent=Sum('absent')
+    )
+    return _percentage(totals['present'], totals['absent'])
+
@@ -0,0 +1,176 @@
+"""
+Directory search backed by an SQLite FTS5 table.
+
+``school_directory_fts`` holds one row per student (rowid = 2 * id) and per
+teacher (rowid = 2 * id + 1) with username, full name, email, roll number
+and class/section. Rows are refreshed from signals (see signals.py), so a
+search is an FTS prefix match instead of ``LIKE '%q%'`` scans over joins.
+The match is an ``id IN (SELECT ...)`` subquery of the page query, so
+keyset pagination and counts see every match.
+
+Purely numeric queries also hit the unique roll-number index directly
+(exact value plus prefix ranges). Without FTS5 (another database, or an
+SQLite build without it) the old ``icontains`` filters are used.
+"""
+import re
+
+from django.db import DatabaseError, connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Student, Teacher
+
+FTS_TABLE = 'school_directory_fts'
+
+# Largest number of digits a roll number can have (64-bit integer)
+MAX_ROLL_DIGITS = 18
+
+STUDENT_ROWS_SQL = f"""
+    INSERT INTO {FTS_TABLE} (rowid, username, full_name, email, roll_number, classroom)
+    SELECT s.id * 2, u.username, TRIM(u.first_name || ' ' || u.last_name), u.email,
+           CAST(s.roll_number AS TEXT), COALESCE(c.class_name || ' ' || c.section, '')
+    FROM school_student s
+    JOIN auth_user u ON u.id = s.user_id
+    LEFT JOIN school_classroom c ON c.id = s.classroom_id
+"""
+
+TEACHER_ROWS_SQL = f"""
+    INSERT INTO {FTS_TABLE} (rowid, username, full_name, email, roll_number, classroom)
+    SELECT t.id * 2 + 1, u.username, t.full_name, t.email, '', ''
+    FROM school_teacher t
+    JOIN auth_user u ON u.id = t.user_id
+"""
+
+_available = None
+
+
+def fts_available():
+    global _available
+    if _available is None:
+        _available = False
+        if connection.vendor == 'sqlite':
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"SELECT rowid FROM {FTS_TABLE} LIMIT 0")
+                _available = True
+            except DatabaseError:
+                pass
+    return _available
+
+
+def _chunks(ids, size=500):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _reindex(insert_sql, alias, ids, offset):
+    ids = list(ids)
+    if not ids or not fts_available():
+        return
+    with connection.cursor() as cursor:
+        for chunk in _chunks(ids):
+            marks = ', '.join(['%s'] * len(chunk))
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({marks})",
+                [pk * 2 + offset for pk in chunk]
+            )
+            cursor.execute(f"{insert_sql} WHERE {alias}.id IN ({marks})", chunk)
+
+
+def index_students(student_ids):
+    """(Re)index the given students; ids that no longer exist are dropped."""
+    _reindex(STUDENT_ROWS_SQL, 's', student_ids, 0)
+
+
+def index_teachers(teacher_ids):
+    """(Re)index the given teachers; ids that no longer exist are dropped."""
+    _reindex(TEACHER_ROWS_SQL, 't', teacher_ids, 1)
+
+
+def rebuild_index():
+    """Drop and refill the whole index; returns the number of rows."""
+    if not fts_available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(STUDENT_ROWS_SQL)
+        cursor.execute(TEACHER_ROWS_SQL)
+        cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE}")
+        return cursor.fetchone()[0]
+
+
+def _match_expression(query):
+    """Every word of the query as a prefix term: ``"10th"* "b"*``."""
+    words = re.findall(r'\w+', query)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def _matching(query, offset):
+    """Q on the ids whose index row matches ``query`` (offset 0: students, 1: teachers)."""
+    expression = _match_expression(query)
+    if not expression:
+        return Q(pk__in=[])
+    return Q(pk__in=RawSQL(
+        f"SELECT rowid / 2 FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid %% 2 = %s",
+        [expression, offset]
+    ))
+
+
+def roll_number_filter(query):
+    """
+    Q for a numeric query: the exact roll number or any roll number that
+    starts with it, as index range scans (12 -> 12, 120-129, 1200-1299, ...).
+    """
+    number = int(query)
+    condition = Q(roll_number=number)
+    for extra in range(1, MAX_ROLL_DIGITS - len(query) + 1):
+        scale = 10 ** extra
+        condition |= Q(roll_number__gte=number * scale, roll_number__lt=(number + 1) * scale)
+    return condition
+
+
+def search_students(queryset, query):
+    query = query.strip()
+    if not query:
+        return queryset
+
+    numeric = query.isdigit() and len(query) <= MAX_ROLL_DIGITS
+    if not fts_available():
+        condition = (
+            Q(user__username__icontains=query) |
+            Q(classroom__class_name__icontains=query) |
+            Q(classroom__section__icontains=query)
+        )
+        if numeric:
+            condition |= roll_number_filter(query)
+        return queryset.filter(condition)
+
+    condition = _matching(query, 0)
+    if numeric:
+        condition |= roll_number_filter(query)
+    return queryset.filter(condition)
+
+
+def search_teachers(queryset, query):
+    query = query.strip()
+    if not query:
+        return queryset
+
+    if not fts_available():
+        return queryset.filter(
+            Q(user__username__icontains=query) |
+            Q(full_name__icontains=query) |
+            Q(email__icontains=query)
+        )
+    return queryset.filter(_matching(query, 1))
+
+
+def index_classroom(classroom_id):
+    """Reindex the students of a renamed classroom."""
+    index_students(Student.objects.filter(classroom_id=classroom_id).values_list('id', flat=True))
+
+
+def index_user(user_id):
+    """Reindex whatever student/teacher belongs to this user."""
+    index_students(Student.objects.filter(user_id=user_id).values_list('id', flat=True))
+    index_teachers(Teacher.objects.filter(user_id=user_id).values_list('id', flat=True))
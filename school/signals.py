@@ -0,0 +1,317 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .autocomplete import (
+    refresh_classroom, refresh_students, refresh_teachers, refresh_user
+)
+from .attendance import (
+    attendance_bulk_saved, expand_compacted, invalidate_rosters, tracking_enabled
+)
+from .models import Attendance, ClassRoom, Fee, Notice, Result, Student, Teacher
+from .absence import update_absence_state
+from .analytics import invalidate_result_stats
+from .fees import apply_fee_deltas, fee_delta, move_fee_balance
+from .leaderboard import invalidate_leaderboards
+from .rollups import apply_attendance_deltas, attendance_deltas
+from .search import index_classroom, index_students, index_teachers, index_user
+from .stats import (
+    MODEL_COUNTERS, adjust_existing_stats, adjust_stats, attendance_stat_deltas, outstanding
+)
+
+
+# =========================
+# Classroom roster cache
+# =========================
+@receiver(pre_save, sender=Student)
+def remember_student_classroom(sender, instance, **kwargs):
+    # Remember the classroom the student is leaving, if any
+    instance._previous_classroom_id = None
+    if instance.pk:
+        instance._previous_classroom_id = (
+            Student.objects.filter(pk=instance.pk)
+            .values_list('classroom_id', flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def student_roster_changed(sender, instance, **kwargs):
+    # After commit, so a concurrent request cannot cache the old roster again
+    classroom_ids = (instance.classroom_id, getattr(instance, '_previous_classroom_id', None))
+    transaction.on_commit(lambda: invalidate_rosters(*classroom_ids))
+
+
+@receiver(post_save, sender=User)
+def user_roster_changed(sender, instance, created, update_fields=None, **kwargs):
+    # Rosters list usernames; logins only touch last_login
+    if created or (update_fields and 'username' not in update_fields):
+        return
+    classroom_ids = list(Student.objects.filter(user_id=instance.pk).values_list('classroom_id', flat=True))
+    if classroom_ids:
+        transaction.on_commit(lambda: invalidate_rosters(*classroom_ids))
+
+
+# =========================
+# Student class label (sort key of the student list)
+# =========================
+@receiver(pre_save, sender=Student)
+def set_student_class_label(sender, instance, **kwargs):
+    instance.class_label = str(instance.classroom) if instance.classroom_id else ''
+
+
+@receiver(post_save, sender=ClassRoom)
+def classroom_label_changed(sender, instance, created, **kwargs):
+    if not created:
+        instance.students.exclude(class_label=str(instance)).update(class_label=str(instance))
+
+
+@receiver(pre_delete, sender=ClassRoom)
+def clear_classroom_labels(sender, instance, **kwargs):
+    # SET_NULL on Student.classroom is a plain UPDATE without Student signals
+    instance.students.update(class_label='')
+
+
+# =========================
+# Derived attendance state
+# (monthly rollups, absence streaks, dashboard day counters)
+# =========================
+@receiver(post_init, sender=Attendance)
+def remember_attendance(sender, instance, **kwargs):
+    # Snapshot of the row as loaded, to compute deltas on save/delete
+    instance._saved_state = None
+    if instance.pk and not instance.get_deferred_fields():
+        instance._saved_state = (instance.student_id, instance.date, instance.status)
+
+
+@receiver(pre_save, sender=Attendance)
+def attendance_saving(sender, instance, raw=False, **kwargs):
+    # Saving onto a compacted day: turn it back into rows and remove this
+    # student's (counted as a delete), so the day is never held twice
+    old = getattr(instance, '_saved_state', None)
+    if raw or not tracking_enabled() or (old and old[:2] == (instance.student_id, instance.date)):
+        return
+    if expand_compacted([instance.student_id], [instance.date]):
+        replaced = Attendance.objects.filter(
+            student_id=instance.student_id, date=instance.date
+        ).exclude(pk=instance.pk)
+        for row in replaced:
+            row.delete()
+
+
+@receiver(post_save, sender=Attendance)
+def attendance_saved(sender, instance, **kwargs):
+    old = getattr(instance, '_saved_state', None)
+    new = (instance.student_id, instance.date, instance.status)
+    if old == new or not tracking_enabled():
+        return
+
+    deltas = [new + (1,)]
+    entries = [new]
+    if old:
+        deltas.append(old + (-1,))
+        if old[:2] != new[:2]:
+            entries.insert(0, old[:2] + (None,))
+    apply_attendance_deltas(deltas)
+    update_absence_state(entries)
+    adjust_stats(attendance_stat_deltas(deltas))
+    instance._saved_state = new
+
+
+def _deleted_with_student(origin):
+    # Attendance only cascades from its student (or the student's user)
+    return origin is not None and getattr(origin, 'model', type(origin)) is not Attendance
+
+
+@receiver(post_delete, sender=Attendance)
+def attendance_deleted(sender, instance, origin=None, **kwargs):
+    old = getattr(instance, '_saved_state', None)
+    if old and tracking_enabled() and not _deleted_with_student(origin):
+        apply_attendance_deltas([old + (-1,)])
+        update_absence_state([old[:2] + (None,)])
+        adjust_stats(attendance_stat_deltas([old + (-1,)]))
+
+
+@receiver(pre_delete, sender=Student)
+def remember_student_attendance(sender, instance, **kwargs):
+    # The rollups and absence state go with the student; only the day
+    # counters need moving, once for all the cascaded rows
+    deltas = [
+        (instance.pk, day, status, -1)
+        for day, status in Attendance.objects.filter(student=instance).values_list('date', 'status')
+    ]
+    instance._attendance_stat_deltas = attendance_stat_deltas(deltas)
+
+
+@receiver(post_delete, sender=Student)
+def student_attendance_deleted(sender, instance, **kwargs):
+    adjust_existing_stats(getattr(instance, '_attendance_stat_deltas', {}))
+
+
+@receiver(attendance_bulk_saved)
+def attendance_bulk_written(sender, changes, **kwargs):
+    if tracking_enabled():
+        deltas = list(attendance_deltas(changes))
+        apply_attendance_deltas(deltas)
+        adjust_stats(attendance_stat_deltas(deltas))
+        update_absence_state(
+            (change.student_id, change.date, change.new_status) for change in changes
+        )
+
+
+# =========================
+# Directory search (full-text index + autocomplete)
+# =========================
+def _after_commit(*calls):
+    """
+    Run the ``(function, argument)`` calls once the transaction commits, so
+    a rollback never reaches the index and readers never see it ahead of
+    the rows.
+    """
+    def run():
+        for function, argument in calls:
+            function(argument)
+    transaction.on_commit(run)
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def student_search_changed(sender, instance, **kwargs):
+    student_ids = [instance.pk]
+    _after_commit((index_students, student_ids), (refresh_students, student_ids))
+
+
+@receiver(post_save, sender=Teacher)
+@receiver(post_delete, sender=Teacher)
+def teacher_search_changed(sender, instance, **kwargs):
+    teacher_ids = [instance.pk]
+    _after_commit((index_teachers, teacher_ids), (refresh_teachers, teacher_ids))
+
+
+@receiver(post_save, sender=User)
+def user_search_changed(sender, instance, created, update_fields=None, **kwargs):
+    # Logins only touch last_login; a new user has no student/teacher yet
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    _after_commit((index_user, instance.pk), (refresh_user, instance.pk))
+
+
+@receiver(post_save, sender=ClassRoom)
+def classroom_search_changed(sender, instance, created, **kwargs):
+    if not created:
+        _after_commit((index_classroom, instance.pk), (refresh_classroom, instance.pk))
+
+
+@receiver(pre_delete, sender=ClassRoom)
+def remember_classroom_students(sender, instance, **kwargs):
+    # SET_NULL on Student.classroom is a plain UPDATE without Student signals
+    instance._student_ids = list(instance.students.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=ClassRoom)
+def classroom_search_deleted(sender, instance, **kwargs):
+    student_ids = getattr(instance, '_student_ids', [])
+    _after_commit((index_students, student_ids), (refresh_students, student_ids))
+
+
+# =========================
+# Dashboard statistics
+# =========================
+@receiver(post_save, sender=Student)
+@receiver(post_save, sender=Teacher)
+@receiver(post_save, sender=ClassRoom)
+@receiver(post_save, sender=Notice)
+def counted_row_saved(sender, instance, created, **kwargs):
+    if created:
+        adjust_stats({MODEL_COUNTERS[sender]: 1})
+
+
+@receiver(post_delete, sender=Student)
+@receiver(post_delete, sender=Teacher)
+@receiver(post_delete, sender=ClassRoom)
+@receiver(post_delete, sender=Notice)
+def counted_row_deleted(sender, instance, **kwargs):
+    adjust_stats({MODEL_COUNTERS[sender]: -1})
+
+
+@receiver(pre_save, sender=Fee)
+def remember_fee_outstanding(sender, instance, **kwargs):
+    previous = None
+    if instance.pk:
+        previous = Fee.objects.filter(pk=instance.pk).values_list('amount', 'paid_amount').first()
+    instance._previous_amounts = previous
+    instance._previous_outstanding = outstanding(*previous) if previous else 0
+
+
+@receiver(post_save, sender=Fee)
+def fee_saved(sender, instance, **kwargs):
+    current = outstanding(instance.amount, instance.paid_amount)
+    adjust_stats({'outstanding_fees': current - getattr(instance, '_previous_outstanding', 0)})
+    instance._previous_outstanding = current
+
+
+@receiver(post_delete, sender=Fee)
+def fee_deleted(sender, instance, **kwargs):
+    adjust_stats({'outstanding_fees': -outstanding(instance.amount, instance.paid_amount)})
+
+
+# =========================
+# Fee balances
+# =========================
+def _student_classroom_id(student_id):
+    return (
+        Student.objects.filter(pk=student_id)
+        .values_list('classroom_id', flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Fee)
+def fee_balance_saved(sender, instance, **kwargs):
+    current = (instance.amount, instance.paid_amount)
+    previous = getattr(instance, '_previous_amounts', None)
+    if previous != current:
+        apply_fee_deltas([fee_delta(
+            instance.student_id, _student_classroom_id(instance.student_id), previous, current
+        )])
+        instance._previous_amounts = current
+
+
+@receiver(post_delete, sender=Fee)
+def fee_balance_deleted(sender, instance, **kwargs):
+    apply_fee_deltas([fee_delta(
+        instance.student_id, _student_classroom_id(instance.student_id),
+        (instance.amount, instance.paid_amount), None
+    )])
+
+
+@receiver(post_save, sender=Student)
+def student_fee_class_changed(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_classroom_id', None)
+    if not created and previous != instance.classroom_id:
+        move_fee_balance(instance.pk, previous, instance.classroom_id)
+
+
+# =========================
+# Result statistics and leaderboard caches
+# =========================
+@receiver(post_save, sender=Result)
+@receiver(post_delete, sender=Result)
+def result_changed(sender, instance, **kwargs):
+    classroom_id = (
+        Student.objects.filter(pk=instance.student_id)
+        .values_list('classroom_id', flat=True)
+        .first()
+    )
+    invalidate_result_stats(classroom_id)
+    invalidate_leaderboards(classroom_id)
+
+
+@receiver(post_save, sender=Student)
+def student_result_class_changed(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_classroom_id', None)
+    if not created and previous != instance.classroom_id:
+        invalidate_result_stats(previous, instance.classroom_id)
+        invalidate_leaderboards(previous, instance.classroom_id)
@@ -0,0 +1,173 @@
+"""
+Materialized dashboard statistics.
+
+Each figure on the dashboard is a DashboardStat row moved by signals as
+the underlying rows change (``UPDATE ... SET value = value + n``), so the
+page reads every widget with one query. Counters:
+
+* ``students``, ``teachers``, ``classrooms``, ``notices``
+* ``outstanding_fees``: sum of the unpaid part of every Fee
+* ``attendance_present:<date>`` / ``attendance_absent:<date>`` per day
+
+A counter that does not exist yet is computed from the source tables the
+first time it is needed. ``reconcile_stats`` (the ``reconcile_dashboard_stats``
+command) recomputes everything and prunes old attendance days.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import Greatest
+
+from .attendance import attendance_breakdown, attendance_totals
+from .models import ClassRoom, DashboardStat, Fee, Notice, Student, Teacher
+
+# Days of per-day attendance counters kept by reconcile_stats
+ATTENDANCE_DAYS = getattr(settings, 'SCHOOL_DASHBOARD_ATTENDANCE_DAYS', 30)
+
+PRESENT = 'attendance_present'
+ABSENT = 'attendance_absent'
+
+COUNTERS = {
+    'students': lambda: Student.objects.count(),
+    'teachers': lambda: Teacher.objects.count(),
+    'classrooms': lambda: ClassRoom.objects.count(),
+    'notices': lambda: Notice.objects.count(),
+    'outstanding_fees': lambda: outstanding_total(Fee.objects.all()),
+}
+
+# Model -> counter of its rows
+MODEL_COUNTERS = {
+    Student: 'students',
+    Teacher: 'teachers',
+    ClassRoom: 'classrooms',
+    Notice: 'notices',
+}
+
+
+def outstanding_total(fees):
+    total = fees.aggregate(
+        due=Sum(Greatest(F('amount') - F('paid_amount'), 0))
+    )['due']
+    return total or 0
+
+
+def outstanding(amount, paid_amount):
+    """Unpaid part of one fee."""
+    return max((amount or 0) - (paid_amount or 0), 0)
+
+
+def day_key(kind, day):
+    return f"{kind}:{day.isoformat()}"
+
+
+def compute_stat(key):
+    """Value of a counter straight from the source tables."""
+    if key in COUNTERS:
+        return COUNTERS[key]()
+    kind, _, day = key.partition(':')
+    day = date.fromisoformat(day)
+    totals = attendance_totals(day, day)
+    return totals['total_present'] if kind == PRESENT else totals['total_absent']
+
+
+def adjust_stats(deltas):
+    """
+    Add ``{key: delta}`` to the counters. Call it after the rows have been
+    written: a counter created here is seeded from the tables, which already
+    include the change.
+    """
+    for key, delta in deltas.items():
+        if not delta:
+            continue
+        updated = DashboardStat.objects.filter(key=key).update(value=F('value') + delta)
+        if not updated:
+            DashboardStat.objects.get_or_create(key=key, defaults={'value': compute_stat(key)})
+
+
+def adjust_existing_stats(deltas):
+    """
+    adjust_stats for the counters that exist, with one UPDATE per distinct
+    delta; missing ones are seeded from the tables when next read. For
+    deletes that touch many days at once (a student and their attendance).
+    """
+    keys_by_delta = defaultdict(list)
+    for key, delta in deltas.items():
+        if delta:
+            keys_by_delta[delta].append(key)
+    for delta, keys in keys_by_delta.items():
+        DashboardStat.objects.filter(key__in=keys).update(value=F('value') + delta)
+
+
+def attendance_stat_deltas(deltas):
+    """Per-day counter deltas for ``(student_id, date, status, sign)`` deltas."""
+    changes = defaultdict(int)
+    for _, day, status, sign in deltas:
+        changes[day_key(PRESENT if status == 'Present' else ABSENT, day)] += sign
+    return changes
+
+
+def get_dashboard_stats(day=None):
+    """
+    Dashboard figures for ``day`` (default today): ``students``,
+    ``teachers``, ``classrooms``, ``notices``, ``outstanding_fees``,
+    ``present_today``, ``absent_today`` and ``attendance_rate`` (None when
+    nothing is marked).
+    """
+    day = day or date.today()
+    present_key = day_key(PRESENT, day)
+    absent_key = day_key(ABSENT, day)
+    keys = [*COUNTERS, present_key, absent_key]
+
+    values = dict(DashboardStat.objects.filter(key__in=keys).values_list('key', 'value'))
+    for key in keys:
+        if key not in values:
+            values[key] = DashboardStat.objects.get_or_create(
+                key=key, defaults={'value': compute_stat(key)}
+            )[0].value
+
+    stats = {key: max(values[key], 0) for key in COUNTERS}
+    present = max(values[present_key], 0)
+    absent = max(values[absent_key], 0)
+    stats['present_today'] = present
+    stats['absent_today'] = absent
+    stats['attendance_rate'] = round(present * 100 / (present + absent), 1) if present + absent else None
+    return stats
+
+
+def reconcile_stats(days=ATTENDANCE_DAYS, today=None):
+    """
+    Recompute every counter (attendance for the last ``days`` days), drop
+    older attendance counters and return ``{key: (stored, actual)}`` for the
+    counters that had drifted.
+    """
+    today = today or date.today()
+    start = today - timedelta(days=days - 1)
+
+    actual = {key: compute() for key, compute in COUNTERS.items()}
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        actual[day_key(PRESENT, day)] = 0
+        actual[day_key(ABSENT, day)] = 0
+    for row in attendance_breakdown(start, today):
+        actual[day_key(PRESENT, row['date'])] += row['present']
+        actual[day_key(ABSENT, row['date'])] += row['absent']
+
+    with transaction.atomic():
+        stored = dict(DashboardStat.objects.values_list('key', 'value'))
+        stale = [key for key in stored if key not in actual]
+        DashboardStat.objects.filter(key__in=stale).delete()
+        DashboardStat.objects.bulk_create(
+            [DashboardStat(key=key, value=value) for key, value in actual.items()],
+            update_conflicts=True,
+            unique_fields=['key'],
+            update_fields=['value']
+        )
+
+    return {
+        key: (stored[key], value)
+        for key, value in actual.items()
+        if key in stored and stored[key] != value
+    }
@@ -1,3 +1,425 @@
-from django.test import TestCase
+import json
+from datetime import date
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from . import fanout
+from .attendance import bulk_mark_attendance, compact_day, get_classroom_roster
+from .autocomplete import autocomplete, directory_index
+from .fees import generate_term_fees, rebuild_fee_balances, record_payment
+from .models import (
+    Attendance, AttendanceBitmap, AttendanceRollup, ClassFeeBalance, ClassRoom, Fee,
+    FeeBalance, FeePayment, Notification, NotificationFanout, Student, UnreadNotificationCount,
+)
+from .pagination import paginate, resolve_sort
+from .rollups import attendance_percentage, rebuild_rollups
+from .search import search_students
+from .views import STUDENT_SORTS
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class SchoolTestCase(TestCase):
+    """Runs on a private in-memory cache, emptied before every test."""
+
+    def setUp(self):
+        cache.clear()
+
+
+def make_classroom(name, section='A'):
+    return ClassRoom.objects.create(class_name=name, section=section, total_students=0, capacity=60)
+
+
+def make_student(roll_number, classroom=None):
+    user = User.objects.create_user(f"student{roll_number}", password='x')
+    return Student.objects.create(
+        user=user,
+        roll_number=roll_number,
+        classroom=classroom,
+        gender='Male',
+        date_of_birth=date(2010, 1, 1),
+        address='-'
+    )
+
+
+class MarkAttendanceDeltaTests(SchoolTestCase):
+
+    def setUp(self):
+        super().setUp()
+        teacher = User.objects.create_user('teacher', password='x')
+        teacher.groups.add(Group.objects.create(name='Teacher'))
+        self.client.force_login(teacher)
+        self.classroom = make_classroom('10th')
+        self.students = [make_student(roll, self.classroom) for roll in (1, 2)]
+        self.version = get_classroom_roster(self.classroom.id).version
+
+    def post(self, body):
+        if not isinstance(body, str):
+            body = json.dumps(body)
+        return self.client.post(reverse('mark_attendance_delta'), body, content_type='application/json')
+
+    def payload(self, changes):
+        return {'classroom': self.classroom.id, 'version': self.version, 'changes': changes}
+
+    def test_saves_changes(self):
+        response = self.post(self.payload([
+            {'student': self.students[0].id, 'status': 'Absent'},
+            {'student': self.students[1].id, 'status': 'Present'},
+        ]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['saved'], 2)
+        self.assertEqual(
+            Attendance.objects.get(student=self.students[0], date=date.today()).status, 'Absent'
+        )
+
+    def test_malformed_bodies_are_rejected(self):
+        student_id = self.students[0].id
+        bodies = [
+            'not json',
+            [1, 2],
+            5,
+            {'version': self.version, 'changes': []},
+            {'classroom': 'x', 'version': self.version, 'changes': []},
+            self.payload(5),
+            self.payload({'student': student_id, 'status': 'Absent'}),
+            self.payload([[student_id, 'Absent']]),
+            self.payload([{'status': 'Absent'}]),
+            self.payload([{'student': 'x', 'status': 'Absent'}]),
+            self.payload([{'student': student_id, 'status': 'Late'}]),
+            self.payload([{'student': 999999, 'status': 'Absent'}]),
+        ]
+        for body in bodies:
+            with self.subTest(body=body):
+                self.assertEqual(self.post(body).status_code, 400)
+        self.assertFalse(Attendance.objects.exists())
+
+    def test_stale_roster_is_rejected(self):
+        body = self.payload([{'student': self.students[0].id, 'status': 'Absent'}])
+        body['version'] = 'old'
+        self.assertEqual(self.post(body).status_code, 409)
+        self.assertFalse(Attendance.objects.exists())
+
+
+class ExportTests(SchoolTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_user('admin', password='x')
+        self.admin.groups.add(Group.objects.create(name='Admin'))
+        classroom = make_classroom('10th')
+        for roll in range(1, 6):
+            make_student(roll, classroom)
+        self.url = reverse('export_data', args=['students'])
+
+    def test_wsgi_export(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(self.url)
+        self.assertFalse(response.is_async)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 6)
+
+    async def test_asgi_export_streams_asynchronously(self):
+        await self.async_client.aforce_login(self.admin)
+        response = await self.async_client.get(self.url)
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        lines = content.decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:2], ['roll_number', 'username'])
+        self.assertEqual([line.split(',')[0] for line in lines[1:]], ['1', '2', '3', '4', '5'])
+
+
+class StudentPaginationTests(SchoolTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # Created out of name order, so classroom ids do not follow the names
+        ninth = make_classroom('9th')
+        tenth = make_classroom('10th', 'B')
+        tenth_a = make_classroom('10th', 'A')
+        classrooms = [ninth, tenth, None, tenth_a]
+        for roll in range(1, 12):
+            make_student(roll, classrooms[roll % len(classrooms)])
+
+    def walk(self, sort, per_page=3):
+        """Student ids page by page forward, then back again from the last page."""
+        _, ordering = resolve_sort(sort, STUDENT_SORTS, 'roll')
+        students = Student.objects.select_related('classroom')
+
+        forward, params = [], {}
+        while True:
+            page = paginate(RequestFactory().get('/', params), students, ordering, per_page)
+            forward.append([student.id for student in page])
+            if not page.has_next:
+                break
+            params = {'after': page.next_cursor}
+
+        backward = [forward[-1]]
+        while page.has_previous:
+            page = paginate(RequestFactory().get('/', {'before': page.previous_cursor}),
+                            students, ordering, per_page)
+            backward.insert(0, [student.id for student in page])
+        return forward, backward
+
+    def expected(self, key, reverse=False):
+        students = sorted(Student.objects.select_related('classroom'), key=key, reverse=reverse)
+        return [student.id for student in students]
+
+    def test_sorts_walk_both_ways(self):
+        def by_class(student):
+            classroom = student.classroom
+            return (classroom.class_name, classroom.section) if classroom else ('', ''), student.roll_number
+
+        cases = {
+            'roll': self.expected(lambda student: student.roll_number),
+            '-roll': self.expected(lambda student: student.roll_number, reverse=True),
+            'class': self.expected(by_class),
+            '-class': self.expected(by_class, reverse=True),
+        }
+        for sort, expected in cases.items():
+            with self.subTest(sort=sort):
+                forward, backward = self.walk(sort)
+                self.assertEqual([pk for page in forward for pk in page], expected)
+                self.assertEqual(backward, forward)
+
+    def test_class_label_follows_classroom(self):
+        classroom = ClassRoom.objects.get(class_name='9th')
+        student = classroom.students.first()
+        self.assertEqual(student.class_label, '9th - A')
+
+        classroom.class_name = '11th'
+        classroom.save()
+        student.refresh_from_db()
+        self.assertEqual(student.class_label, '11th - A')
+
+        classroom.delete()
+        student.refresh_from_db()
+        self.assertEqual((student.classroom_id, student.class_label), (None, ''))
+
+
+class FeeTests(SchoolTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.ninth = make_classroom('9th')
+        self.tenth = make_classroom('10th')
+        self.students = [make_student(roll, self.ninth if roll % 2 else self.tenth) for roll in range(1, 7)]
+
+    def assertBalancesRebuilt(self):
+        """The running balances equal what rebuild_fee_balances computes from the fees."""
+        def snapshot():
+            return (
+                set(FeeBalance.objects.values_list('student_id', 'classroom_id', 'billed', 'paid', 'due')),
+                set(ClassFeeBalance.objects.exclude(billed=0, paid=0, due=0)
+                    .values_list('classroom_id', 'billed', 'paid', 'due')),
+            )
+        running = snapshot()
+        rebuild_fee_balances()
+        self.assertEqual(running, snapshot())
+
+    def test_term_fees_are_billed_once_per_student(self):
+        run = generate_term_fees({self.ninth.id: 1000}, 'Term 1')
+        self.assertEqual((run.created, run.skipped), (3, 0))
+
+        late = make_student(7, self.ninth)
+        run = generate_term_fees({self.ninth.id: 1000, self.tenth.id: 800}, 'Term 1')
+        self.assertEqual((run.created, run.skipped), (4, 3))
+        self.assertEqual(Fee.objects.filter(term='Term 1').count(), 7)
+        self.assertTrue(Fee.objects.filter(student=late, term='Term 1', amount=1000).exists())
+        self.assertBalancesRebuilt()
+
+    def test_balances_follow_payments_and_class_changes(self):
+        generate_term_fees({self.ninth.id: 1000, self.tenth.id: 800}, 'Term 1')
+        first, second = self.students[:2]
+        extra = Fee.objects.create(student=first, amount=300, paid_amount=100)
+
+        fee = Fee.objects.get(student=first, term='Term 1')
+        record_payment(fee, 400)
+        record_payment(fee, 700)
+        record_payment(Fee.objects.get(student=second, term='Term 1'), 800)
+        self.assertBalancesRebuilt()
+        self.assertEqual(
+            FeeBalance.objects.filter(student=first).values_list('billed', 'paid', 'due').get(),
+            (1300, 1200, 200)
+        )
+
+        first.classroom = self.tenth
+        first.save()
+        extra.delete()
+        self.assertBalancesRebuilt()
+        self.assertEqual(ClassFeeBalance.objects.get(classroom=self.tenth).billed, 3 * 800 + 1000)
+
+    def test_admin_deletes_a_payment(self):
+        admin = User.objects.create_user('admin', password='x')
+        admin.groups.add(Group.objects.create(name='Admin'))
+        self.client.force_login(admin)
+        generate_term_fees({self.ninth.id: 1000}, 'Term 1')
+        fee = Fee.objects.get(student=self.students[0], term='Term 1')
+        record_payment(fee, 1000, paid_on=date(2026, 1, 10))
+        payment = record_payment(fee, 200, paid_on=date(2026, 2, 10))
+
+        response = self.client.post(reverse('delete_fee_payment', args=[payment.id]))
+        self.assertRedirects(response, reverse('view_fee', args=[fee.student_id]))
+        fee.refresh_from_db()
+        self.assertEqual((fee.paid_amount, fee.status, fee.payment_date), (1000, 'paid', date(2026, 1, 10)))
+        self.assertFalse(FeePayment.objects.filter(id=payment.id).exists())
+        self.assertBalancesRebuilt()
+
+    def test_hand_made_fees_do_not_count_as_billed(self):
+        student = self.students[0]
+        Fee.objects.create(student=student, amount=500, remarks='Term 1')
+        Fee.objects.create(student=student, amount=500, remarks='Term 1')
+
+        run = generate_term_fees({self.ninth.id: 1000}, 'Term 1')
+        self.assertEqual(run.created, 3)
+        self.assertBalancesRebuilt()
+
+
+class RosterCacheTests(SchoolTestCase):
+
+    def test_roster_is_dropped_after_commit(self):
+        classroom = make_classroom('10th')
+        make_student(1, classroom)
+        self.assertEqual(len(get_classroom_roster(classroom.id).students), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            student = make_student(2, classroom)
+            # Until the commit, other requests must keep the old roster
+            self.assertEqual(len(get_classroom_roster(classroom.id).students), 1)
+        self.assertEqual(len(get_classroom_roster(classroom.id).students), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            student.user.username = 'renamed'
+            student.user.save()
+        self.assertIn('renamed', [entry.username for entry in get_classroom_roster(classroom.id).students])
+
+
+class DirectorySearchTests(SchoolTestCase):
+
+    def found(self, query):
+        return (
+            [entry['id'] for entry in autocomplete(query)],
+            list(search_students(Student.objects.all(), query).values_list('id', flat=True)),
+        )
+
+    def test_index_follows_committed_writes(self):
+        directory_index.load()
+        with self.captureOnCommitCallbacks(execute=True):
+            student = make_student(42)
+            self.assertEqual(self.found('student42'), ([], []))
+        self.assertEqual(self.found('student42'), ([student.id], [student.id]))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            student.user.username = 'zelda'
+            student.user.save()
+        self.assertEqual(self.found('zelda'), ([student.id], [student.id]))
+        self.assertEqual(self.found('student42'), ([], []))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            student.delete()
+        self.assertEqual(self.found('zelda'), ([], []))
+
+
+class AttendanceRollupTests(SchoolTestCase):
+
+    def setUp(self):
+        super().setUp()
+        classroom = make_classroom('10th')
+        self.students = [make_student(roll, classroom) for roll in range(1, 5)]
+        self.loner = make_student(5)
+
+    def assertRollupsRebuilt(self):
+        """The running rollups equal what rebuild_rollups computes from rows and bitmaps."""
+        def snapshot():
+            return set(
+                AttendanceRollup.objects.exclude(present=0, absent=0)
+                .values_list('student_id', 'year', 'month', 'present', 'absent')
+            )
+        running = snapshot()
+        rebuild_rollups()
+        self.assertEqual(running, snapshot())
+
+    def test_mixed_bulk_and_single_writes(self):
+        first, second = self.students[:2]
+        days = [date(2026, 1, 30), date(2026, 1, 31), date(2026, 2, 2)]
+        bulk_mark_attendance(
+            (student.id, day, 'Present') for student in self.students for day in days
+        )
+        bulk_mark_attendance([(first.id, days[0], 'Absent'), (first.id, days[0], 'Present'),
+                              (second.id, days[1], 'Absent')])
+
+        record = Attendance.objects.get(student=first, date=days[2])
+        record.status = 'Absent'
+        record.save()
+        Attendance.objects.create(student=self.loner, date=days[2], status='Absent')
+        Attendance.objects.get(student=second, date=days[0]).delete()
+        self.assertRollupsRebuilt()
+
+        self.assertEqual(attendance_percentage(first.id, (2026, 1), (2026, 1)), 100.0)
+        self.assertEqual(attendance_percentage(first.id, (2026, 2), (2026, 2)), 0.0)
+        self.assertEqual(attendance_percentage(second.id), 50.0)
+
+    def test_writes_to_a_compacted_day(self):
+        day = date(2026, 3, 2)
+        bulk_mark_attendance([(student.id, day, 'Present') for student in self.students + [self.loner]])
+        self.assertEqual(compact_day(day), 4)
+        self.assertTrue(AttendanceBitmap.objects.filter(date=day).exists())
+        self.assertRollupsRebuilt()
+
+        # A single save and a bulk write, each while the day is compacted
+        Attendance.objects.create(student=self.students[1], date=day, status='Absent')
+        self.assertRollupsRebuilt()
+        compact_day(day)
+        bulk_mark_attendance([(self.students[0].id, day, 'Absent')])
+        self.assertRollupsRebuilt()
+        self.assertEqual(Attendance.objects.filter(date=day).count(), 5)
+
+        compact_day(day)
+        Attendance.objects.filter(student=self.loner, date=day).delete()
+        self.students[2].delete()
+        self.assertRollupsRebuilt()
+        self.assertEqual(
+            AttendanceRollup.objects.filter(student=self.students[1]).values_list('present', 'absent').get(),
+            (0, 1)
+        )
+
+
+@mock.patch.object(fanout, 'BACKGROUND', False)
+@mock.patch.object(fanout, 'CHUNK_SIZE', 2)
+@mock.patch.object(fanout, 'INLINE_LIMIT', 3)
+class NotificationFanoutTests(SchoolTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_user('admin', password='x')
+        self.users = [User.objects.create_user(f"user{index}", password='x') for index in range(5)]
+
+    def assertCountersMatch(self):
+        unread = {
+            user.id: Notification.objects.filter(user=user, is_read=False).count()
+            for user in [self.admin, *self.users]
+        }
+        counters = dict(UnreadNotificationCount.objects.values_list('user_id', 'count'))
+        self.assertEqual({user_id: counters.get(user_id, 0) for user_id in unread}, unread)
+
+    def test_counters_follow_fan_out_reads_and_deletes(self):
+        self.assertEqual(fanout.notify('Small', '-', users=[user.id for user in self.users[:2]]), 2)
+        self.assertCountersMatch()
+
+        queued = fanout.notify('New Notice: Holiday', '-', school=True, sender=self.admin)
+        self.assertIsInstance(queued, NotificationFanout)
+        self.assertEqual(fanout.deliver_pending(), 5)
+        self.assertEqual(fanout.deliver_pending(), 0)
+        self.assertFalse(Notification.objects.filter(user=self.admin).exists())
+        self.assertCountersMatch()
+
+        reader = self.users[0]
+        self.client.force_login(reader)
+        first, second = Notification.objects.filter(user=reader).order_by('id')
+        self.client.get(reverse('mark_notification_read', args=[first.id]))
+        self.client.get(reverse('mark_notification_read', args=[first.id]))
+        self.client.get(reverse('delete_notification', args=[second.id]))
+        self.assertCountersMatch()
+        self.assertEqual(self.client.get(reverse('unread_notification_count')).json(), {'unread': 0})
@@ -6,15 +6,19 @@ urlpatterns = [
     path("login/", views.login_view, name="login"),
     path("dashboard/", views.dashboard, name="dashboard"),
     path("add-student/", views.add_student, name="add_student"),
+    path("students/import/", views.import_students_view, name="import_students"),
     path("add-teacher/", views.add_teacher, name="add_teacher"),
     path("students/", views.view_students, name="view_students"),
     path("teachers/",views.view_teachers, name="view_teachers"),
+    path("directory/autocomplete/", views.directory_autocomplete, name="directory_autocomplete"),
     path("logout/", views.logout_view, name="logout"),
     path('student/update/<int:id>/', views.update_student, name='update_student'),
     path('student/delete/<int:id>/', views.delete_student, name='delete_student'),
     path('teacher/update/<int:id>/', views.update_teacher, name='update_teacher'),
     path('teacher/delete/<int:id>/', views.delete_teacher, name='delete_teacher'),
     path('mark_attendance/', views.mark_attendance, name='mark_attendance'),
+    path('mark_attendance/delta/', views.mark_attendance_delta, name='mark_attendance_delta'),
+    path('attendance/upload/', views.upload_attendance_log, name='upload_attendance_log'),
     path("view_attendance/", views.view_attendance, name='view_attendance'),
     path("notices/", views.notice_list, name="notice_list"),
     path("notices/add/", views.add_notice, name="add_notice"),
@@ -28,6 +32,8 @@ urlpatterns = [
     path('students/<int:student_id>/', views.student_profile, name="student_profile"),
     path('teachers/<int:teacher_id>/', views.teacher_profile, name='teacher_profile'),
     path('notifications/', views.notifications, name='notifications'),
+    path('notifications/stream/', views.notification_stream, name='notification_stream'),
+    path('notifications/count/', views.unread_notification_count, name='unread_notification_count'),
     path('notifications/read/<int:id>/', views.mark_notification_read, name='mark_notification_read'),
     path('notification/delete/<int:id>/', views.delete_notification, name="delete_notification"),
     path('classroom/update/<int:id>/', views.update_classroom, name='update_classroom'),
@@ -36,8 +42,15 @@ urlpatterns = [
     path('result/view/<int:student_id>/', views.view_result, name='view_result_admin'),
     path('result/view/<int:student_id>/', views.view_result, name='view_result'),
     path('result/edit/<int:student_id>/', views.edit_result, name='edit_result'),
+    path('result/statistics/', views.result_statistics_view, name='result_statistics'),
+    path('export/<str:dataset>/', views.export_data, name='export_data'),
+    path('result/grid/', views.marks_grid, name='marks_grid'),
     path('fees/add/<int:student_id>/', views.add_fee, name='add_fee'),
     path('fees/view/<int:student_id>/', views.view_fee, name='view_fee'),
+    path('fees/pay/<int:fee_id>/', views.record_fee_payment, name='record_fee_payment'),
+    path('fees/payment/delete/<int:payment_id>/', views.delete_fee_payment, name='delete_fee_payment'),
+    path('fees/dues/', views.fee_dues, name='fee_dues'),
+    path('fees/generate/', views.generate_fees, name='generate_fees'),
     path('assignments/', views.view_assignments, name='view_assignments'),
     path('assignments/add/', views.add_assignment, name='add_assignment'),
     path('assignments/update/<int:id>/', views.update_assignment, name='update_assignment'),
@@ -1,17 +1,146 @@
-from .models import Notification
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+
+from .live import publish
+from .models import Notification, UnreadNotificationCount
+from .writebehind import WriteBehindBuffer
+
+# create_notification batches: flushed at this many notifications or every
+# interval seconds, at most LIMIT waiting; off writes each one as it is created
+NOTIFICATION_BUFFER_SIZE = getattr(settings, 'SCHOOL_NOTIFICATION_BUFFER_SIZE', 100)
+NOTIFICATION_BUFFER_LIMIT = getattr(settings, 'SCHOOL_NOTIFICATION_BUFFER_LIMIT', 10000)
+NOTIFICATION_FLUSH_INTERVAL = getattr(settings, 'SCHOOL_NOTIFICATION_FLUSH_INTERVAL', 2.0)
+NOTIFICATION_WRITE_BEHIND = getattr(settings, 'SCHOOL_NOTIFICATION_WRITE_BEHIND', True)
+
+
+def get_user_roles(user):
+    """
+    Return the set of group names for ``user``.
+
+    The groups are loaded at most once per request: the result is kept on
+    the user object, which lives for one request (``request.user``). They
+    are not cached across requests, so a role change applies on the very
+    next request in every server process.
+    """
+    if not user.is_authenticated:
+        return frozenset()
+
+    roles = getattr(user, '_school_roles', None)
+    if roles is None:
+        roles = frozenset(user.groups.values_list('name', flat=True))
+        user._school_roles = roles
+    return roles
+
 
 def is_admin(user):
-    return user.is_superuser or user.groups.filter(name='Admin').exists()
+    return user.is_authenticated and (user.is_superuser or 'Admin' in get_user_roles(user))
 
 def is_teacher(user):
-    return user.groups.filter(name='Teacher').exists()
+    return 'Teacher' in get_user_roles(user)
 
 def is_student(user):
-    return user.groups.filter(name='Student').exists()
+    return 'Student' in get_user_roles(user)
+
+def is_admin_or_teacher(user):
+    return bool(get_user_roles(user) & {'Admin', 'Teacher'})
+
+
+def adjust_unread_count(user_id, delta):
+    """
+    Add ``delta`` to the user's unread notification counter.
+    Call it after the Notification rows have been written.
+    """
+    updated = UnreadNotificationCount.objects.filter(user_id=user_id).update(
+        count=F('count') + delta
+    )
+    if not updated:
+        # No counter yet: seed it from the table, which already includes this change
+        unread = Notification.objects.filter(user_id=user_id, is_read=False).count()
+        UnreadNotificationCount.objects.get_or_create(
+            user_id=user_id,
+            defaults={'count': unread}
+        )
+    publish({user_id: []})
+
+
+def adjust_unread_counts(user_ids, delta):
+    """
+    adjust_unread_count for many users at once: one UPDATE for the users
+    that have a counter, the others are seeded from the table.
+    """
+    user_ids = list(user_ids)
+    existing = set(
+        UnreadNotificationCount.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True)
+    )
+    UnreadNotificationCount.objects.filter(user_id__in=existing).update(count=F('count') + delta)
+
+    missing = [user_id for user_id in user_ids if user_id not in existing]
+    if missing:
+        unread = dict(
+            Notification.objects.filter(user_id__in=missing, is_read=False)
+            .values_list('user_id')
+            .annotate(n=Count('id'))
+            .order_by()
+        )
+        UnreadNotificationCount.objects.bulk_create(
+            [
+                UnreadNotificationCount(user_id=user_id, count=unread.get(user_id, 0))
+                for user_id in missing
+            ],
+            ignore_conflicts=True
+        )
+
+
+def get_unread_count(user):
+    if not user.is_authenticated:
+        return 0
+    count = UnreadNotificationCount.objects.filter(user=user).values_list(
+        'count', flat=True
+    ).first()
+    return max(count or 0, 0)
+
+
+def _write_notifications(items):
+    """Write buffered ``(user_id, title, message)`` notifications in one batch."""
+    with transaction.atomic():
+        Notification.objects.bulk_create(
+            [Notification(user_id=user_id, title=title, message=message) for user_id, title, message in items],
+            batch_size=500
+        )
+        # Users with the same number of new notifications share one UPDATE
+        per_user = Counter(user_id for user_id, _, _ in items if user_id)
+        users_by_count = defaultdict(list)
+        for user_id, count in per_user.items():
+            users_by_count[count].append(user_id)
+        for count, user_ids in users_by_count.items():
+            adjust_unread_counts(user_ids, count)
+
+        titles = defaultdict(list)
+        for user_id, title, _ in items:
+            titles[user_id].append(title)
+        publish(titles)
+
+
+# Audit notifications ("Student Added", ...) are written behind the request
+notification_buffer = WriteBehindBuffer(
+    'notification-buffer',
+    _write_notifications,
+    max_size=NOTIFICATION_BUFFER_SIZE,
+    interval=NOTIFICATION_FLUSH_INTERVAL,
+    enabled=NOTIFICATION_WRITE_BEHIND,
+    max_pending=NOTIFICATION_BUFFER_LIMIT
+)
+
 
 def create_notification(user, title, message):
-    Notification.objects.create(
-        user = user,
-        title = title,
-        message = message
-    )
\ No newline at end of file
+    """
+    Notify ``user`` (may be None). The row is written by the write-behind
+    buffer shortly after the current transaction commits; the unsaved
+    Notification is returned.
+    """
+    notification = Notification(user=user, title=title, message=message)
+    notification_buffer.add((notification.user_id, title, message))
+    return notification
@@ -1,18 +1,42 @@
 from django.shortcuts import render,redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout,update_session_auth_hash
 from django.contrib.auth.decorators import login_required
-from .models import Student, Teacher, Attendance, Notice, ClassRoom,Notification, Result, Fee, Assignment
-from .forms import StudentForm, TeacherForm, ResultForm, FeeForm, AssignmentForm
+from .models import Student, Teacher, Notice, ClassRoom,Notification, Result, Fee, FeePayment, Assignment, AbsenceStreak, FeeBalance, ClassFeeBalance
+from .forms import StudentForm, TeacherForm, ResultForm, FeeForm, FeePaymentForm, AssignmentForm
 from django.contrib.auth.models import User,Group
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Count, Q
 from django.contrib import messages
 from .decorators import admin_only, teacher_only, student_only, admin_or_teacher_only
 from datetime import date
+import io
+import json
 from django.utils.timezone import now
+from django.utils.dateparse import parse_date
 from .forms import ChangePasswordForm
-from .utils import create_notification
+from .utils import create_notification, adjust_unread_count, get_unread_count, is_student
+from .live import event_stream, streaming_supported
+from .rollups import attendance_percentage, monthly_attendance
+from .ingest import import_students, ingest_attendance_log
+from .pagination import paginate, resolve_sort
+from .search import search_students, search_teachers
+from .autocomplete import autocomplete
+from .stats import get_dashboard_stats
+from .analytics import MAX_MARKS, SUBJECTS, SUBJECT_FIELDS, result_statistics
+from .results import bulk_save_results, results_by_student
+from .leaderboard import get_standing
+from .exports import EXPORTS, async_lines
+from .fanout import notify
+from .fees import DUES_STATUSES, delete_payment, dues_report, generate_term_fees, record_payment
+from .attendance import (
+    ATTENDANCE_STATUSES, attendance_breakdown, attendance_totals, bulk_mark_attendance,
+    day_statuses, get_classroom_roster, paginate_attendance_records,
+)
 from django.shortcuts import get_object_or_404, redirect
-from django.http import HttpResponseForbidden
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_POST
+from django.urls import reverse
+from asgiref.sync import sync_to_async
 
 # Create your views here.
 def login_view(request):
@@ -37,15 +61,14 @@ def login_view(request):
 
 @login_required(login_url="login")
 def dashboard(request):
-    total_students = Student.objects.count()
-    total_teachers = Teacher.objects.count()
-    total_class = ClassRoom.objects.count()
-    total_notice = Notice.objects.count()
+    # Materialized counters (school/stats.py): one query for every widget
+    stats = get_dashboard_stats()
     context = {
-        "total_students": total_students,
-        "total_teachers": total_teachers,
-        "total_class": total_class,
-        "total_notice": total_notice,
+        "total_students": stats['students'],
+        "total_teachers": stats['teachers'],
+        "total_class": stats['classrooms'],
+        "total_notice": stats['notices'],
+        "stats": stats,
     }
     return render(request, "school/dashboard.html", context)
 
@@ -92,6 +115,27 @@ def add_student(request):
    
     return render(request, 'school/add_student.html', {'form': form})
 
+@login_required
+@admin_only
+def import_students_view(request):
+    """
+    Upload a CSV of students; see school/ingest.py for the columns.
+    """
+    report = None
+    if request.method == "POST" and request.FILES.get('students_file'):
+        upload = request.FILES['students_file']
+        source = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='', errors='replace')
+        report = import_students(source)
+        create_notification(
+            request.user,
+            "Students Imported",
+            f"'{upload.name}': {report.summary()}"
+        )
+
+    return render(request, 'school/import_students.html', {
+        'report': report
+    })
+
 @login_required
 @admin_only
 def add_teacher(request):
@@ -128,20 +172,29 @@ def add_teacher(request):
         form = TeacherForm()
     return render(request, 'school/add_teacher.html', {'form': form})
 
+# Student list sort keys, each backed by an index (see Student.Meta)
+STUDENT_SORTS = {
+    'roll': ('roll_number',),
+    'class': ('class_label', 'roll_number'),
+    'dob': ('date_of_birth', 'id'),
+}
+
 def view_students(request):
     students = Student.objects.select_related('classroom', 'user')
 
-    q = request.GET.get('q')
+    q = request.GET.get('q', '').strip()
     if q:
-        students = students.filter(
-            Q(user__username__icontains=q) |
-            Q(roll_number__icontains=q) |
-            Q(classroom__class_name__icontains=q) |
-            Q(classroom__section__icontains=q)
-        )
+        # Full-text index + roll number index instead of LIKE '%q%' scans
+        students = search_students(students, q)
+
+    sort, ordering = resolve_sort(request.GET.get('sort'), STUDENT_SORTS, 'roll')
+    page = paginate(request, students, ordering)
 
     return render(request, 'school/view_students.html', {
-        'students': students
+        'students': page,
+        'page': page,
+        'sort': sort,
+        'query': q
     })
 
 def delete_student(request, id):
@@ -194,17 +247,31 @@ def view_teachers(request):
     teachers = Teacher.objects.select_related('user').all()
 
     if query:
-        teachers = teachers.filter(
-            Q(user__username__icontains=query) |
-            Q(full_name__icontains=query) |
-            Q(email__icontains=query)
-        )
+        teachers = search_teachers(teachers, query)
+
+    page = paginate(request, teachers, ('full_name', 'id'))
 
     return render(request, 'school/view_teachers.html', {
-       'teachers': teachers,
+       'teachers': page,
+       'page': page,
        'query': query
     })
 
+@login_required
+@admin_or_teacher_only
+def directory_autocomplete(request):
+    """Typeahead suggestions for the student/teacher search boxes."""
+    kind = request.GET.get('type')
+    if kind not in ('student', 'teacher'):
+        kind = None
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 25)
+    except ValueError:
+        limit = 10
+    return JsonResponse({
+        'results': autocomplete(request.GET.get('q', ''), kind, limit)
+    })
+
 def update_teacher(request, id):
     teacher = Teacher.objects.get(id=id)
 
@@ -246,42 +313,167 @@ def delete_teacher(request, id):
 @login_required
 @teacher_only
 def mark_attendance(request):
-    students = Student.objects.select_related('user').all()
+    """
+    Attendance sheet for one classroom.
+    Defaults to the first class the teacher is class teacher of, so the
+    form only carries that class's students instead of the whole school.
+    """
     today = date.today()
-
-    if request.method == "POST":
-        for student in students :
+    classrooms = list(ClassRoom.objects.order_by('class_name', 'section'))
+    my_classrooms = [c for c in classrooms if c.class_teacher_id == request.user.id]
+
+    selected = request.POST.get('classroom') or request.GET.get('classroom')
+    classroom = None
+    if selected:
+        classroom = next((c for c in classrooms if str(c.id) == selected), None)
+    elif my_classrooms:
+        classroom = my_classrooms[0]
+    elif classrooms:
+        classroom = classrooms[0]
+
+    roster = get_classroom_roster(classroom.id) if classroom else None
+
+    if request.method == "POST" and roster:
+        marks = []
+        for student in roster.students:
             status = request.POST.get(str(student.id))
-            if status:
-                Attendance.objects.update_or_create(
-                    student=student,
-                    date=today,
-                    defaults={"status": status}
-                )
-        return redirect('view_attendance')
+            if status in ATTENDANCE_STATUSES:
+                marks.append((student.id, today, status))
+        # One read + one bulk insert/update instead of a query pair per student
+        bulk_mark_attendance(marks)
+        return redirect(f"{reverse('view_attendance')}?classroom={classroom.id}")
+
+    rows = []
+    if roster:
+        marked = day_statuses((student.id for student in roster.students), today)
+        # Unmarked students default to Present but still have to be sent
+        rows = [
+            (student, marked.get(student.id, 'Present'), student.id in marked)
+            for student in roster.students
+        ]
 
     return render(request, "school/mark_attendance.html", {
-        "students": students,
-        "today": today
+        "rows": rows,
+        "today": today,
+        "classroom": classroom,
+        "classrooms": classrooms,
+        "my_classrooms": my_classrooms,
+        "roster_version": roster.version if roster else "",
     })
 
 @login_required
-def view_attendance(request):
-    # Get selected date or default to today
-    selected_date = request.GET.get('date') or now().date()
+@teacher_only
+@require_POST
+def mark_attendance_delta(request):
+    """
+    JSON endpoint used by the attendance sheet to send only the rows that
+    changed. Body::
+
+        {"classroom": 1, "version": "<roster version>",
+         "changes": [{"student": 12, "status": "Present"},
+                     {"student": 13, "status": "Absent"}]}
 
-    # ALWAYS define records (no condition)
-    records = Attendance.objects.filter(date=selected_date)
+    A malformed body is rejected with 400 and a submission made against an
+    older roster with 409, both before anything is written.
+    """
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid request body'}, status=400)
+    if not isinstance(payload, dict):
+        return JsonResponse({'error': 'Invalid request body'}, status=400)
+
+    changes = payload.get('changes', [])
+    if not isinstance(changes, list):
+        return JsonResponse({'error': 'changes must be a list'}, status=400)
+    try:
+        classroom_id = int(payload['classroom'])
+        version = str(payload['version'])
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'Invalid request body'}, status=400)
 
-    # Safe usage
-    total_present = records.filter(status='Present').count()
-    total_absent = records.filter(status='Absent').count()
+    today = date.today()
+    marks = []
+    for change in changes:
+        if not isinstance(change, dict) or change.get('status') not in ATTENDANCE_STATUSES:
+            return JsonResponse({'error': 'Invalid change entry'}, status=400)
+        try:
+            student_id = int(change['student'])
+        except (ValueError, KeyError, TypeError):
+            return JsonResponse({'error': 'Invalid change entry'}, status=400)
+        marks.append((student_id, today, change['status']))
+
+    roster = get_classroom_roster(classroom_id)
+    if version != roster.version:
+        return JsonResponse({
+            'error': 'The class list has changed, please reload the sheet.',
+            'version': roster.version,
+        }, status=409)
+
+    allowed = {student.id for student in roster.students}
+    for student_id, _, _ in marks:
+        if student_id not in allowed:
+            return JsonResponse({'error': f'Invalid change for student {student_id}'}, status=400)
+
+    written = bulk_mark_attendance(marks)
+    return JsonResponse({'saved': len(written), 'version': roster.version})
+
+@login_required
+@admin_or_teacher_only
+def upload_attendance_log(request):
+    """
+    Upload a gate terminal / CSV attendance export.
+    The file is parsed line by line from the upload, never read whole.
+    """
+    report = None
+    if request.method == "POST" and request.FILES.get('log_file'):
+        upload = request.FILES['log_file']
+        log = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='', errors='replace')
+        report = ingest_attendance_log(log)
+        create_notification(
+            request.user,
+            "Attendance Imported",
+            f"'{upload.name}': {report.summary()}"
+        )
+
+    return render(request, 'school/upload_attendance_log.html', {
+        'report': report
+    })
+
+@login_required
+def view_attendance(request):
+    """
+    Attendance records with totals and a per-day, per-class breakdown.
+    Filters: ``date`` (single day) or ``start``/``end`` range, and ``classroom``.
+    """
+    today = now().date()
+    single_day = parse_date(request.GET.get('date') or '')
+    start_date = single_day or parse_date(request.GET.get('start') or '') or today
+    end_date = single_day or parse_date(request.GET.get('end') or '') or start_date
+    if end_date < start_date:
+        start_date, end_date = end_date, start_date
+
+    classroom_id = request.GET.get('classroom') or ''
+    if not classroom_id.isdigit():
+        classroom_id = ''
+
+    # Totals and the per-day, per-class breakdown are aggregated in SQL;
+    # days compacted into bitmaps are merged in by the read helpers
+    totals = attendance_totals(start_date, end_date, classroom_id)
+    breakdown = attendance_breakdown(start_date, end_date, classroom_id)
+    records = paginate_attendance_records(request, start_date, end_date, classroom_id)
 
     context = {
         'records': records,
-        'selected_date': selected_date,
-        'total_present': total_present,
-        'total_absent': total_absent,
+        'page': records,
+        'breakdown': breakdown,
+        'selected_date': start_date if start_date == end_date else '',
+        'start_date': start_date,
+        'end_date': end_date,
+        'classrooms': ClassRoom.objects.order_by('class_name', 'section'),
+        'selected_classroom': int(classroom_id) if classroom_id else None,
+        'total_present': totals['total_present'],
+        'total_absent': totals['total_absent'],
     }
 
     return render(request, 'school/view_attendance.html', context)
@@ -289,8 +481,10 @@ def view_attendance(request):
 
 def notice_list(request):
     notices = Notice.objects.select_related('created_by')
+    page = paginate(request, notices, ('-created_at', '-id'))
     return render(request, "school/notice_list.html", {
-        "notices": notices
+        "notices": page,
+        "page": page
     })
 
 @login_required
@@ -305,6 +499,7 @@ def add_notice(request):
             message=message,
             created_by = request.user
         )
+        notify(f"New Notice: {title}", message, school=True, sender=request.user)
         create_notification(
         request.user,
         "Notice Added",
@@ -416,8 +611,10 @@ def view_classroom(request):
         Q(class_name__icontains=search)|
         Q(section__icontains=search)
         )
+    page = paginate(request, classrooms, ('class_name', 'section', 'id'))
     return render(request, 'school/view_classroom.html', {
-        'classroom': classrooms
+        'classroom': page,
+        'page': page
     })
 
 
@@ -463,13 +660,20 @@ def student_profile(request, student_id):
     student = get_object_or_404(Student, id=student_id)
 
     # STUDENT: only allow own profile
-    if request.user.groups.filter(name='Student').exists():
+    if is_student(request.user):
         if request.user != student.user:
             return HttpResponseForbidden("Access Denied")
 
+    # Attendance comes from the monthly rollups, not from every daily row
+    months = list(monthly_attendance(student.id)[:12])
+
     # ADMIN / TEACHER: allowed
     return render(request, 'school/student_profile.html', {
-        'student': student
+        'student': student,
+        'attendance_percentage': attendance_percentage(student.id),
+        'monthly_attendance': months,
+        'absence': AbsenceStreak.objects.filter(student=student, flagged=True).first(),
+        'standing': get_standing(student),
     })
 @login_required
 def teacher_profile(request, teacher_id):
@@ -484,24 +688,53 @@ def teacher_profile(request, teacher_id):
 def notifications(request):
     notifications = Notification.objects.filter(
         user = request.user
-    ).order_by('-created_at')
+    )
+    page = paginate(request, notifications, ('-created_at', '-id'))
 
     return render(
         request,
         'school/notifications.html',
-        {'notifications': notifications}
+        {'notifications': page, 'page': page}
     )
+async def notification_stream(request):
+    """
+    Server-Sent Events of the user's unread count (school/live.py). Needs an
+    ASGI server (home/asgi.py) so idle streams do not hold a worker thread;
+    under WSGI it answers 204, which tells EventSource not to reconnect.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=401)
+    if not streaming_supported(request):
+        return HttpResponse(status=204)
+    unread = await sync_to_async(get_unread_count)(user)
+    response = StreamingHttpResponse(event_stream(user.pk, unread), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+@login_required
+def unread_notification_count(request):
+    """Unread count polled by pages served without live streams (WSGI)."""
+    return JsonResponse({'unread': get_unread_count(request.user)})
+
 @login_required
 def mark_notification_read(request, id):
-    notification = Notification.objects.get(id=id, user=request.user)
-    notification.is_read = True
-    notification.save()
+    notification = get_object_or_404(Notification, id=id, user=request.user)
+    # Conditional UPDATE: of two concurrent clicks only one moves the counter
+    if Notification.objects.filter(pk=notification.pk, is_read=False).update(is_read=True):
+        adjust_unread_count(request.user.id, -1)
     return redirect('notifications')
 
 def delete_notification(request, id):
     # Only allow user to delete their own notification
     notification = get_object_or_404(Notification, id=id, user=request.user)
-    notification.delete()
+    # Only the request that actually deletes an unread row moves the counter
+    deleted, _ = Notification.objects.filter(pk=notification.pk, is_read=False).delete()
+    if deleted:
+        adjust_unread_count(request.user.id, -1)
+    else:
+        Notification.objects.filter(pk=notification.pk).delete()
     return redirect(request.META.get('HTTP_REFERER', 'dashboard'))
 
 
@@ -574,15 +807,123 @@ def view_result(request, student_id):
     result = Result.objects.filter(student=student).first()
 
     # student can only view own result
-    if request.user.groups.filter(name='Student').exists():
+    if is_student(request.user):
         if request.user != student.user:
             return HttpResponseForbidden("Access Denied")
 
     return render(request, 'school/view_result.html', {
         'student': student,
-        'result': result
+        'result': result,
+        'standing': get_standing(student) if result else None
+    })
+
+@login_required
+@admin_or_teacher_only
+def marks_grid(request):
+    """
+    Enter or edit the results of a whole classroom on one page.
+    Loads the roster and the existing results in two queries and saves the
+    grid in one transaction (see results.bulk_save_results).
+    """
+    classrooms = list(ClassRoom.objects.order_by('class_name', 'section'))
+    my_classrooms = [c for c in classrooms if c.class_teacher_id == request.user.id]
+
+    selected = request.POST.get('classroom') or request.GET.get('classroom')
+    classroom = None
+    if selected:
+        classroom = next((c for c in classrooms if str(c.id) == selected), None)
+    elif my_classrooms:
+        classroom = my_classrooms[0]
+    elif classrooms:
+        classroom = classrooms[0]
+
+    roster = get_classroom_roster(classroom.id) if classroom else None
+    students = roster.students if roster else ()
+    errors = []
+    entered = {}
+
+    if request.method == "POST" and roster:
+        marks = {}
+        for student in students:
+            values = [request.POST.get(f"{student.id}-{field}", '').strip() for field in SUBJECT_FIELDS]
+            entered[student.id] = values
+            if not any(values):
+                # Left blank: no result for this student yet
+                continue
+            if not all(value.isdigit() and int(value) <= MAX_MARKS for value in values):
+                errors.append(f"Roll {student.roll_number}: every mark must be a number from 0 to {MAX_MARKS}.")
+                continue
+            marks[student.id] = [int(value) for value in values]
+
+        if not errors:
+            created, updated = bulk_save_results(marks, classroom.id)
+            messages.success(request, f"Results saved: {created} added, {updated} updated.")
+            return redirect(f"{reverse('marks_grid')}?classroom={classroom.id}")
+
+    results = results_by_student(student.id for student in students)
+    rows = []
+    for student in students:
+        values = entered.get(student.id)
+        if values is None:
+            result = results.get(student.id)
+            values = [getattr(result, field) if result else '' for field in SUBJECT_FIELDS]
+        rows.append((student, list(zip(SUBJECT_FIELDS, values)), results.get(student.id)))
+
+    return render(request, 'school/marks_grid.html', {
+        'classroom': classroom,
+        'classrooms': classrooms,
+        'my_classrooms': my_classrooms,
+        'subjects': SUBJECTS,
+        'max_marks': MAX_MARKS,
+        'rows': rows,
+        'errors': errors,
+    })
+
+@login_required
+@admin_or_teacher_only
+def result_statistics_view(request):
+    """Class (or whole-school) result statistics, computed in analytics.py."""
+    classrooms = list(ClassRoom.objects.order_by('class_name', 'section'))
+    selected = request.GET.get('classroom', '')
+    classroom = next((c for c in classrooms if str(c.id) == selected), None)
+
+    stats = result_statistics(classroom.id if classroom else None)
+
+    return render(request, 'school/result_statistics.html', {
+        'classrooms': classrooms,
+        'classroom': classroom,
+        'stats': stats,
     })
 
+@login_required
+@admin_or_teacher_only
+def export_data(request, dataset):
+    """
+    Stream a CSV export (see exports.py). Filters: ``classroom``,
+    ``start``/``end`` (attendance, fees) and ``status`` (fees).
+    """
+    export = EXPORTS.get(dataset)
+    if export is None:
+        raise Http404("Unknown export")
+
+    classroom_id = request.GET.get('classroom') or ''
+    start = parse_date(request.GET.get('start') or '')
+    end = parse_date(request.GET.get('end') or '')
+    if start and end and end < start:
+        start, end = end, start
+
+    lines = export(
+        classroom_id=int(classroom_id) if classroom_id.isdigit() else None,
+        start=start,
+        end=end,
+        status=request.GET.get('status'),
+    )
+    if streaming_supported(request):
+        lines = async_lines(lines)
+    response = StreamingHttpResponse(lines, content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{dataset}-{now().date()}.csv"'
+    return response
+
 @login_required
 @admin_or_teacher_only
 def edit_result(request, student_id):
@@ -606,39 +947,153 @@ def edit_result(request, student_id):
 @login_required
 @admin_or_teacher_only
 def add_fee(request, student_id):
+    """Bill a new installment; an amount paid right away is its first payment."""
     student = get_object_or_404(Student, id=student_id)
 
-    fee = Fee.objects.filter(student=student).first()
-
     if request.method == "POST":
-        form = FeeForm(request.POST, instance=fee)
+        form = FeeForm(request.POST)
         if form.is_valid():
-            fee = form.save(commit=False)
-            fee.student = student
-            fee.save()
+            with transaction.atomic():
+                fee = form.save(commit=False)
+                fee.student = student
+                fee.save()
+                if form.cleaned_data.get('paid_amount'):
+                    record_payment(
+                        fee,
+                        form.cleaned_data['paid_amount'],
+                        paid_on=form.cleaned_data.get('payment_date'),
+                        recorded_by=request.user
+                    )
             messages.success(request, "Fee saved successfully")
-            return redirect('view_students')
+            return redirect('view_fee', student_id=student.id)
     else:
-        form = FeeForm(instance=fee)
+        form = FeeForm()
 
     return render(request, 'school/add_fee.html', {
         'form': form,
         'student': student
     })
 
+@login_required
+@admin_or_teacher_only
+@require_POST
+def record_fee_payment(request, fee_id):
+    fee = get_object_or_404(Fee, id=fee_id)
+    form = FeePaymentForm(request.POST, fee=fee)
+    if form.is_valid():
+        record_payment(
+            fee,
+            form.cleaned_data['amount'],
+            paid_on=form.cleaned_data['paid_on'],
+            remarks=form.cleaned_data['remarks'],
+            recorded_by=request.user
+        )
+        messages.success(request, "Payment recorded")
+    else:
+        for errors in form.errors.values():
+            for error in errors:
+                messages.error(request, error)
+    return redirect('view_fee', student_id=fee.student_id)
+
+@login_required
+@admin_only
+@require_POST
+def delete_fee_payment(request, payment_id):
+    """Take back a payment recorded by mistake (fees.delete_payment)."""
+    payment = get_object_or_404(FeePayment.objects.select_related('fee'), id=payment_id)
+    delete_payment(payment)
+    messages.success(request, "Payment deleted")
+    return redirect('view_fee', student_id=payment.fee.student_id)
+
 @login_required
 def view_fee(request, student_id):
     student = get_object_or_404(Student, id=student_id)
 
-    if request.user.groups.filter(name='Student').exists():
+    if is_student(request.user):
         if request.user != student.user:
             return HttpResponseForbidden("Access Deniend")
         
-    fees = Fee.objects.filter(student = student).order_by('-created_at')
+    fees = (
+        Fee.objects.filter(student = student)
+        .prefetch_related('payments')
+        .order_by('-created_at', '-id')
+    )
+    balance = FeeBalance.objects.filter(student=student).first()
 
     return render(request, 'school/view_fees.html',{
         'student': student,
-        'fees': fees
+        'fees': fees,
+        'balance': balance,
+        'payment_form': FeePaymentForm(initial={'paid_on': now().date()}),
+    })
+
+@login_required
+@admin_only
+def generate_fees(request):
+    """Bill a term's fee to whole classrooms from a per-class schedule (fees.generate_term_fees)."""
+    classrooms = list(ClassRoom.objects.annotate(enrolled=Count('students')).order_by('class_name', 'section'))
+    run = None
+    error = None
+    term = ''
+
+    if request.method == "POST":
+        term = request.POST.get('term', '').strip()
+        schedule = {}
+        for classroom in classrooms:
+            amount = classroom.amount = request.POST.get(f'amount-{classroom.id}', '').strip()
+            if not amount:
+                continue
+            if not amount.isdigit():
+                error = f"Invalid amount for {classroom}"
+                break
+            schedule[classroom.id] = int(amount)
+
+        if error is None and not term:
+            error = "Enter the term the fees are for"
+        elif error is None and len(term) > Fee._meta.get_field('term').max_length:
+            error = "The term name is too long"
+        elif error is None and not schedule:
+            error = "Enter the amount for at least one class"
+
+        if error is None:
+            run = generate_term_fees(schedule, term)
+            create_notification(request.user, "Fees Generated", run.summary())
+
+    return render(request, 'school/generate_fees.html', {
+        'classrooms': classrooms,
+        'run': run,
+        'error': error,
+        'term': term,
+    })
+
+@login_required
+@admin_or_teacher_only
+def fee_dues(request):
+    """
+    School-wide dues from the running balances (school/fees.py).
+    Filters: ``classroom`` and ``status`` (``pending`` / ``paid``).
+    """
+    classroom_id = request.GET.get('classroom') or ''
+    if not classroom_id.isdigit():
+        classroom_id = ''
+    status = request.GET.get('status', 'pending')
+    if status not in DUES_STATUSES:
+        status = ''
+
+    balances, totals = dues_report(classroom_id, status)
+    page = paginate(request, balances, ('-due', 'id'))
+    class_balances = ClassFeeBalance.objects.select_related('classroom').order_by(
+        'classroom__class_name', 'classroom__section'
+    )
+
+    return render(request, 'school/fee_dues.html', {
+        'balances': page,
+        'page': page,
+        'totals': totals,
+        'class_balances': class_balances,
+        'classrooms': ClassRoom.objects.order_by('class_name', 'section'),
+        'selected_classroom': int(classroom_id) if classroom_id else None,
+        'status': status,
     })
 
 @login_required
@@ -650,6 +1105,12 @@ def add_assignment(request):
             assignment = form.save(commit=False)
             assignment.created_by = request.user
             assignment.save()
+            notify(
+                f"New Assignment: {assignment.title}",
+                f"{assignment.subject} assignment due {assignment.due_date}",
+                classrooms=[assignment.classroom_id],
+                sender=request.user
+            )
 
             messages.success(request, "Assignment added successfully")
             return redirect('view_assignments')
@@ -660,15 +1121,18 @@ def add_assignment(request):
 
 @login_required
 def view_assignments(request):
-    if request.user.groups.filter(name='Student').exists():
-        assignments = Assignment.objects.filter(
+    if is_student(request.user):
+        assignments = Assignment.objects.select_related('classroom').filter(
             classroom=request.user.student.classroom
         )
     else:
-        assignments = Assignment.objects.all()
+        assignments = Assignment.objects.select_related('classroom')
+
+    page = paginate(request, assignments, ('-due_date', '-id'))
 
     return render(request, 'school/view_assignments.html', {
-        'assignments': assignments
+        'assignments': page,
+        'page': page
     })
 @login_required
 @admin_or_teacher_only
@@ -0,0 +1,108 @@
+"""
+In-process write-behind buffer.
+
+Items added during a request are kept in memory (once the request's
+transaction commits, so a rolled-back change leaves no trace) and written
+together by a background thread: every ``interval`` seconds, or as soon
+as ``max_size`` items are waiting. Whatever is left is written when the
+process exits.
+
+The buffer knows nothing about models: it hands each batch to the
+``write`` function it was built with (see utils.create_notification).
+When a batch fails, its items are written one by one and those that fail
+again (e.g. a notification for a user deleted meanwhile) are logged and
+dropped, so one bad item cannot block the rest. At most ``max_pending``
+items wait at a time; beyond that the oldest are dropped.
+
+Items still waiting when the process is killed outright are lost, so it
+is meant for records such as audit notifications, not for data the
+application reads back within the same request.
+"""
+import atexit
+import logging
+import threading
+
+from django.db import close_old_connections, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+
+    def __init__(self, name, write, max_size=100, interval=2.0, enabled=True, max_pending=10000):
+        self.name = name
+        self.write = write
+        self.max_size = max_size
+        self.max_pending = max(max_pending, max_size)
+        self.interval = interval
+        self.enabled = enabled
+        self._items = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        atexit.register(self.flush)
+
+    def add(self, item):
+        """Queue ``item`` once the current transaction (if any) commits."""
+        transaction.on_commit(lambda: self._append(item))
+
+    def _append(self, item):
+        if not self.enabled:
+            self.write([item])
+            return
+        with self._lock:
+            self._items.append(item)
+            overflow = len(self._items) - self.max_pending
+            if overflow > 0:
+                del self._items[:overflow]
+            full = len(self._items) >= self.max_size
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+        if overflow > 0:
+            logger.error("Write-behind buffer %s is full, dropped %d items", self.name, overflow)
+        if full:
+            self._wakeup.set()
+
+    def pending(self):
+        with self._lock:
+            return len(self._items)
+
+    def flush(self):
+        """Write everything waiting now. Returns the number of items written."""
+        with self._flush_lock:
+            with self._lock:
+                items, self._items = self._items, []
+            if not items:
+                return 0
+            try:
+                self.write(items)
+            except Exception:
+                logger.exception("Write-behind flush of %s failed, retrying item by item", self.name)
+                return self._write_each(items)
+            return len(items)
+
+    def _write_each(self, items):
+        """Write ``items`` one at a time, dropping those that fail."""
+        written = 0
+        for item in items:
+            try:
+                self.write([item])
+            except Exception:
+                logger.exception("Write-behind %s dropped %r", self.name, item)
+            else:
+                written += 1
+        return written
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if not self.pending():
+                continue
+            close_old_connections()
+            try:
+                self.flush()
+            finally:
+                connection.close()